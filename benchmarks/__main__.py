@@ -0,0 +1,292 @@
+#!/usr/bin/env python3
+""" Benchmarks of the cookie, crypto and log parsing hot paths.
+
+    Usage, from repository root:
+
+        python3 -m benchmarks [--rows N] [--lines M] [--repeat R] [--filter NAME] [--output FILE] [--compare BASELINE]
+
+    Every benchmark works on synthetic fixtures (benchmarks/fixtures.py) built in a temporary folder,
+    is run R times and reports its best and median time. Results are printed as json, --output saves
+    them to be used later as a --compare baseline: benchmarks slower than the baseline by more than
+    --threshold are reported and make the command exit with 1.
+"""
+
+import os
+import gc
+import sys
+import json
+import time
+import shutil
+import argparse
+import platform
+import tempfile
+import statistics
+from benchmarks import fixtures
+from chromium import chromium
+from common import adsplog
+from common import deviceid
+from common import logextract
+
+
+# name -> function(workdir, rows, lines) returning {'run': callable, 'ops': operations per run, 'reset': callable or None}
+BENCHMARKS = {}
+
+
+def benchmark(name):
+    def decorator(function):
+        BENCHMARKS[name] = function
+        return function
+    return decorator
+
+
+@benchmark('chromium.encrypt')
+def chromiumEncrypt(workdir, rows, lines):
+    db = chromium.Cookies(workdir, 'Cookies', 'cookies')
+    values = [cookie['value'] for cookie in fixtures.cookies(rows)]
+    return {'run': lambda: db.encryptMany(values), 'ops': rows}
+
+
+@benchmark('chromium.decrypt')
+def chromiumDecrypt(workdir, rows, lines):
+    db = chromium.Cookies(workdir, 'Cookies', 'cookies')
+    values = db.encryptMany([cookie['value'] for cookie in fixtures.cookies(rows)])
+    return {'run': lambda: db.decryptMany(values), 'ops': rows}
+
+
+@benchmark('chromium.get')
+def chromiumGet(workdir, rows, lines):
+    db = fixtures.chromiumCookies('{}/chromium'.format(workdir), rows)
+    lookups = [(cookie['name'], cookie['domain']) for cookie in fixtures.cookies(rows)[::max(1, rows // 100)]]
+
+    def run():
+        with db.session(readonly=True):
+            for name, domain in lookups:
+                db.get(name, domain)
+    return {'run': run, 'ops': len(lookups)}
+
+
+@benchmark('chromium.set')
+def chromiumSet(workdir, rows, lines):
+    db = fixtures.chromiumCookies('{}/chromium-set'.format(workdir), 0)
+    cookies = fixtures.cookies(rows)
+
+    def run():
+        with db:
+            db.setMany(cookies)
+
+    def reset():
+        with db:
+            db.flush()
+    return {'run': run, 'ops': rows, 'reset': reset}
+
+
+@benchmark('cookies.parse')
+def cookiesParse(workdir, rows, lines):
+    db = chromium.Cookies(workdir, 'Cookies', 'cookies')
+    cookies = fixtures.cookies(rows)
+
+    def run():
+        for cookie in cookies:
+            db.getDeviceIdsFromCookie(cookie)
+    return {'run': run, 'ops': rows}
+
+
+@benchmark('deviceid.extractMany')
+def deviceidExtractMany(workdir, rows, lines):
+    values = [cookie['value'] for cookie in fixtures.cookies(rows)]
+    return {'run': lambda: deviceid.extractMany(values), 'ops': rows}
+
+
+@benchmark('firefox.get')
+def firefoxGet(workdir, rows, lines):
+    db = fixtures.firefoxCookies('{}/firefox'.format(workdir), rows)
+    lookups = [(cookie['name'], cookie['domain']) for cookie in fixtures.cookies(rows)[::max(1, rows // 100)]]
+
+    def run():
+        with db.session(readonly=True):
+            for name, domain in lookups:
+                db.get(name, domain)
+    return {'run': run, 'ops': len(lookups)}
+
+
+@benchmark('firefox.set')
+def firefoxSet(workdir, rows, lines):
+    db = fixtures.firefoxCookies('{}/firefox-set'.format(workdir), 0)
+    cookies = fixtures.cookies(rows)
+
+    def run():
+        with db:
+            db.setMany(cookies)
+
+    def reset():
+        with db:
+            db.flush()
+    return {'run': run, 'ops': rows, 'reset': reset}
+
+
+@benchmark('database.flush')
+def databaseFlush(workdir, rows, lines):
+    db = fixtures.firefoxCookies('{}/firefox-flush'.format(workdir), 0)
+    cookies = fixtures.cookies(rows)
+
+    def run():
+        with db:
+            db.flush()
+
+    def reset():
+        with db:
+            db.setMany(cookies)
+    return {'run': run, 'ops': rows, 'reset': reset}
+
+
+@benchmark('database.restore')
+def databaseRestore(workdir, rows, lines):
+    db = fixtures.firefoxCookies('{}/firefox-restore'.format(workdir), 0)
+    db.snapshot()
+    cookies = fixtures.cookies(rows)
+
+    def reset():
+        with db:
+            db.setMany(cookies)
+    return {'run': db.restore, 'ops': rows, 'reset': reset}
+
+
+@benchmark('adsplog.getLastLine')
+def adsplogGetLastLine(workdir, rows, lines):
+    folder = '{}/logs-last'.format(workdir)
+    fixtures.logTree(folder, lines)
+
+    def run():
+        log = adsplog.AdspLog(folder)
+        log.getLastLine()
+        log.close()
+    return {'run': run, 'ops': 1}
+
+
+@benchmark('adsplog.getDeviceIds')
+def adsplogGetDeviceIds(workdir, rows, lines):
+    folder = '{}/logs-parse'.format(workdir)
+    filename, = fixtures.logTree(folder, lines)
+    with open(filename, encoding='utf-8') as f:
+        log_lines = f.readlines()
+    log = adsplog.AdspLog(folder)
+
+    def run():
+        for line in log_lines:
+            log.getDeviceIds(line)
+    return {'run': run, 'ops': len(log_lines)}
+
+
+@benchmark('logextract.extract')
+def logextractExtract(workdir, rows, lines):
+    folder = '{}/logs-extract'.format(workdir)
+    fixtures.logTree(folder, lines, files=4)
+    return {'run': lambda: list(logextract.extract(folder, malformed=True, workers=1)), 'ops': lines}
+
+
+def measure(setup, repeat):
+    """ Runs a benchmark repeat times, garbage collection off as timeit does
+    :return: dict
+    """
+    times = []
+    for _ in range(repeat):
+        if setup.get('reset'):
+            setup['reset']()
+        gc_enabled = gc.isenabled()
+        gc.disable()
+        try:
+            start = time.perf_counter()
+            setup['run']()
+            times.append(time.perf_counter() - start)
+        finally:
+            if gc_enabled:
+                gc.enable()
+
+    best = min(times)
+    return {
+        'ops': setup['ops'],
+        'repeat': repeat,
+        'min_s': round(best, 6),
+        'median_s': round(statistics.median(times), 6),
+        'per_op_us': round(best / setup['ops'] * 1e6, 3),
+    }
+
+
+def run(names, rows, lines, repeat):
+    """ Runs benchmarks over fixtures built in a temporary folder
+    :return: dict report
+    """
+    workdir = tempfile.mkdtemp(prefix='deviceid-bench-')
+    results = {}
+    try:
+        for name in names:
+            folder = '{}/{}'.format(workdir, name)
+            os.makedirs(folder)
+            results[name] = measure(BENCHMARKS[name](folder, rows, lines), repeat)
+            print('{:<24} {:>12.3f} ms'.format(name, results[name]['min_s'] * 1e3), file=sys.stderr)
+    finally:
+        shutil.rmtree(workdir)
+
+    return {
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'rows': rows,
+        'lines': lines,
+        'results': results,
+    }
+
+
+def compare(report, baseline, threshold):
+    """ Compares best times with a baseline report
+    :param threshold: relative slowdown above which a benchmark is a regression, e.g. 0.15
+    :return: list of regressed benchmark names
+    """
+    regressions = []
+    print('{:<24} {:>12} {:>12} {:>8}'.format('benchmark', 'baseline ms', 'current ms', 'ratio'), file=sys.stderr)
+    for name, result in report['results'].items():
+        reference = baseline['results'].get(name)
+        if not reference:
+            continue
+        ratio = result['min_s'] / reference['min_s'] if reference['min_s'] else 1
+        regressed = ratio > 1 + threshold
+        if regressed:
+            regressions.append(name)
+        print('{:<24} {:>12.3f} {:>12.3f} {:>8.2f}{}'.format(name, reference['min_s'] * 1e3, result['min_s'] * 1e3, ratio, '  REGRESSION' if regressed else ''), file=sys.stderr)
+
+    if (baseline.get('rows'), baseline.get('lines')) != (report['rows'], report['lines']):
+        print('warning: baseline was measured with rows={} lines={}'.format(baseline.get('rows'), baseline.get('lines')), file=sys.stderr)
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python3 -m benchmarks', description='Benchmark cookie, crypto and log parsing hot paths.')
+    parser.add_argument('--rows', type=int, default=10000, help='cookies per fixture database')
+    parser.add_argument('--lines', type=int, default=100000, help='lines per fixture log tree')
+    parser.add_argument('--repeat', type=int, default=5, help='runs per benchmark, best and median are kept')
+    parser.add_argument('--filter', action='append', help='only run benchmarks whose name contains this, repeatable')
+    parser.add_argument('--output', help='save results as json, e.g. as a future baseline')
+    parser.add_argument('--compare', help='baseline json to compare with')
+    parser.add_argument('--threshold', type=float, default=0.15, help='relative slowdown reported as a regression')
+    args = parser.parse_args(argv)
+
+    names = [name for name in BENCHMARKS if not args.filter or any(part in name for part in args.filter)]
+    if not names:
+        parser.error('no benchmark matches the given filters')
+
+    report = run(names, args.rows, args.lines, args.repeat)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+    else:
+        print(json.dumps(report, indent=2))
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        if compare(report, baseline, args.threshold):
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
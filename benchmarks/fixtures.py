@@ -0,0 +1,110 @@
+""" Synthetic fixtures for the benchmarks: cookie databases with N rows and adsp log trees with M lines.
+    Content is derived from a seed, so two runs work on the same data.
+"""
+
+import os
+import json
+import random
+import sqlite3
+import uuid
+from datetime import datetime
+from chromium import chromium
+from firefox import firefox
+
+
+CHROMIUM_SCHEMA = """
+    CREATE TABLE cookies (creation_utc INTEGER NOT NULL, host_key TEXT NOT NULL, name TEXT NOT NULL, value TEXT NOT NULL,
+        path TEXT NOT NULL, expires_utc INTEGER NOT NULL, secure INTEGER NOT NULL, httponly INTEGER NOT NULL,
+        last_access_utc INTEGER NOT NULL, has_expires INTEGER NOT NULL DEFAULT 1, persistent INTEGER NOT NULL DEFAULT 1,
+        priority INTEGER NOT NULL DEFAULT 1, encrypted_value BLOB DEFAULT '', firstpartyonly INTEGER NOT NULL DEFAULT 0,
+        UNIQUE (host_key, name, path));
+    """
+
+FIREFOX_SCHEMA = """
+    CREATE TABLE moz_cookies (id INTEGER PRIMARY KEY, baseDomain TEXT, appId INTEGER DEFAULT 0, inBrowserElement INTEGER DEFAULT 0,
+        name TEXT, value TEXT, host TEXT, path TEXT, expiry INTEGER, lastAccessed INTEGER, creationTime INTEGER,
+        isSecure INTEGER, isHttpOnly INTEGER, CONSTRAINT moz_uniqueid UNIQUE (name, host, path, appId, inBrowserElement));
+    CREATE INDEX moz_basedomain ON moz_cookies (baseDomain, appId, inBrowserElement);
+    """
+
+
+def deviceId(rng):
+    return '{}.{}'.format(rng.randint(1400000000, 1500000000), uuid.UUID(int=rng.getrandbits(128)))
+
+
+def cookieValue(rng, encoded=False, devices=1):
+    """ adsp cookie value, as the first party script (plain) or the third party server (url encoded) writes it
+    """
+    value = 'ls={}|v=1|{}'.format(rng.randint(1400000000000, 1500000000000), '|'.join('di={}'.format(deviceId(rng)) for _ in range(devices)))
+    if encoded:
+        value = value.replace('=', '%3D').replace('|', '%7C')
+    return value
+
+
+def cookies(count, seed=0):
+    """ Cookie dicts for setMany(), spread over count / 10 domains
+    """
+    rng = random.Random(seed)
+    domains = max(1, count // 10)
+    return [{'name': 'adsp{}'.format(n // domains), 'value': cookieValue(rng, encoded=n % 2 == 1), 'domain': 'site{}.com'.format(n % domains)}
+            for n in range(count)]
+
+
+def chromiumCookies(folder, rows, seed=0):
+    """ Chromium cookie database with `rows` encrypted cookies
+    :return: chromium.Cookies, not set up
+    """
+    os.makedirs(folder, exist_ok=True)
+    filename = '{}/Cookies'.format(folder)
+    if os.path.exists(filename):
+        os.remove(filename)
+    connection = sqlite3.connect(filename)
+    connection.executescript(CHROMIUM_SCHEMA)
+    connection.close()
+
+    db = chromium.Cookies(folder, 'Cookies', 'cookies')
+    with db:
+        db.setMany(cookies(rows, seed))
+    return db
+
+
+def firefoxCookies(folder, rows, seed=0):
+    """ Firefox cookie database with `rows` cookies
+    :return: firefox.Cookies, not set up
+    """
+    os.makedirs(folder, exist_ok=True)
+    filename = '{}/cookies.sqlite'.format(folder)
+    if os.path.exists(filename):
+        os.remove(filename)
+    connection = sqlite3.connect(filename)
+    connection.executescript(FIREFOX_SCHEMA)
+    connection.close()
+
+    db = firefox.Cookies(folder, 'cookies.sqlite', 'moz_cookies')
+    with db:
+        db.setMany(cookies(rows, seed))
+    return db
+
+
+def logLine(rng, now):
+    columns = [now.strftime('%Y-%m-%d %H:%M:%S')] + ['col{}'.format(n) for n in range(12)]
+    data = {'type': 'display', 'deviceIds': [deviceId(rng) for _ in range(rng.randint(1, 3))]}
+    return '{},{}\n'.format(','.join(columns), json.dumps(data))
+
+
+def logTree(base_folder, lines, files=1, seed=0):
+    """ adsp log tree with `lines` lines spread over `files` files of the current hour folder
+    :return: list of file names
+    """
+    rng = random.Random(seed)
+    now = datetime.today()
+    folder = '{}/{}/{}/{}/{}'.format(base_folder, now.year, now.month, now.day, now.hour)
+    os.makedirs(folder, exist_ok=True)
+
+    filenames = []
+    for n in range(files):
+        filename = '{}/access{}.log'.format(folder, n)
+        with open(filename, 'w', encoding='utf-8') as f:
+            f.writelines(logLine(rng, now) for _ in range(lines // files))
+        filenames.append(filename)
+    return filenames
@@ -1,16 +1,44 @@
+from common import backups
 from common import database
+from common import deviceid
+from common import domains
+from common import pageload
+from common import timing
+from chromium import devtools
 from sqlite3 import Binary
+import os
 import subprocess
-import sys
-import re
-import shutil
+import time
 from datetime import datetime, timedelta, timezone
-import urllib.parse
 import json
+import functools
+from contextlib import contextmanager
 from Crypto.Cipher import AES
 from Crypto.Protocol.KDF import PBKDF2
 
 
+BLOCK = 16
+
+
+@functools.lru_cache(maxsize=None)
+def deriveKey(password, salt, length, iterations):
+    """ PBKDF2 key, derived once per process for given (password, salt, length, iterations)
+    """
+    return PBKDF2(password, salt, length, iterations)
+
+
+@functools.lru_cache(maxsize=None)
+def blockCipher(key):
+    """ AES in ECB mode is stateless, so one object per key is reused for every value.
+        CBC chaining is done by encryptMany/decryptMany over whole batches, single values use the native CBC mode.
+    """
+    return AES.new(key, AES.MODE_ECB)
+
+
+def xor(a, b):
+    return (int.from_bytes(a, 'big') ^ int.from_bytes(b, 'big')).to_bytes(len(a), 'big')
+
+
 class Cookies(database.Database):
     def __init__(self, *args):
         super().__init__(*args)
@@ -19,23 +47,40 @@ class Cookies(database.Database):
         self.length = 16
         self.password = 'peanuts'.encode('utf8')
         self.iterations = 1
-        self.key = PBKDF2(self.password, self.salt, self.length, self.iterations)
+        self.key = deriveKey(self.password, self.salt, self.length, self.iterations)
+        # (name, host_key) -> cookies, see buildIndex()
+        self.index = None
 
     def delete(self, name, domain):
-        query = 'DELETE FROM {} WHERE name=? AND host=?;'.format(self.db_table)
+        query = self.statement('DELETE FROM {} WHERE name=? AND host=?;')
         values = (name, domain)
         self.db_cursor.execute(query, values);
 
 
+    def hostKeys(self, domain):
+        """ host_key values a cookie of a domain can be stored under
+        :param domain: domain or url
+        :return: tuple (undotted, dotted) host keys of the registrable domain
+        """
+        host_key = domains.registrable(domain)
+        return (host_key, '.{}'.format(host_key))
+
+
+    @timing.timed('cookies.read')
     def get(self, name, domain):
-        # domain
-        if 'http' not in domain:
-            domain = 'http://{}'.format(domain)
-        parsed_domain = urllib.parse.urlparse(domain).netloc 
-        host_key = '.'.join(parsed_domain.split('.')[-2:])
-
-        query = 'SELECT name, host_key, value, encrypted_value FROM {} WHERE name=? AND host_key LIKE ?;'.format(self.db_table)
-        values = (name, '%{}'.format(host_key))
+        host_keys = self.hostKeys(domain)
+
+        if self.index is not None:
+            for host_key in host_keys:
+                cookies = self.index.get((name, host_key))
+                if cookies:
+                    return dict(cookies[0])
+            return {}
+
+        # exact matches so the (host_key, name, ...) unique index is used,
+        # host-only cookies of subdomains, e.g. www2.adsp.localhost, are not found
+        query = self.statement('SELECT name, host_key, value, encrypted_value FROM {} WHERE name=? AND host_key IN (?, ?) LIMIT 1;')
+        values = (name,) + host_keys
         result = self.db_cursor.execute(query, values).fetchone()
 
         cookie = {}
@@ -56,94 +101,181 @@ class Cookies(database.Database):
         return cookie
 
 
-    def set(self, name, value, domain, path='/', creation_utc=None, expires_utc=None, secure=0, httponly=0, last_access_utc=None, has_expires=1, persistent=1, priority=1, firstpartyonly=0):
+    def buildIndex(self):
+        """ Reads the whole table once into a (name, host_key) -> cookies dict used by get() afterwards,
+            values are decrypted in one batch. Meant for audits reading many cookies of a jar that doesn't change.
+        :return: dict
+        """
+        query = self.statement('SELECT name, host_key, value, encrypted_value FROM {};')
+        rows = self.db_cursor.execute(query).fetchall()
 
-        # [Google Chrome's] timestamp is formatted as the number of microseconds since January, 1601"
-        start_date = datetime(1601, 1, 1, hour=0, minute=0, second=0, microsecond=0, tzinfo=timezone.utc)
+        index = {}
+        decrypted_values = self.decryptMany([row[3] for row in rows if row[3]])
+        decrypted_values.reverse()
+        for (cookie_name, cookie_domain, cookie_value, cookie_encrypted_value) in rows:
+            cookie = {
+                'name': cookie_name,
+                'domain': cookie_domain,
+                'value': decrypted_values.pop() if cookie_encrypted_value else cookie_value,
+                'encrypted_value': cookie_encrypted_value,
+            }
+            index.setdefault((cookie_name, cookie_domain), []).append(cookie)
 
-        a_year = timedelta(days=365)
-        today = datetime.now(tz=timezone.utc)
+        self.index = index
+        return index
 
-        # domain
-        begins_with_point = domain[0] == '.'
-        if 'http' not in domain:
-            domain = 'http://{}'.format(domain)
-        parsed_domain = urllib.parse.urlparse(domain).netloc 
-        host_key = '.'.join(parsed_domain.split('.')[-2:])
-        if begins_with_point:
-            host_key = '.{}'.format(host_key)
 
+    def dropIndex(self):
+        self.index = None
 
-        if expires_utc is None:
-            expires_utc = int(((today + a_year) - start_date).total_seconds() * 1000000) # in microseconds
-            expires_utc = expires_utc * 10  # move floating point to the right
 
-        if last_access_utc is None:
-            last_access_utc = (today - start_date).total_seconds() * 1000000 # in microseconds
-            last_access_utc = last_access_utc * 10  # move floating point to the right
+    def set(self, name, value, domain, path='/', creation_utc=None, expires_utc=None, secure=0, httponly=0, last_access_utc=None, has_expires=1, persistent=1, priority=1, firstpartyonly=0):
+        self.setMany([{
+            'name': name, 'value': value, 'domain': domain, 'path': path, 'creation_utc': creation_utc, 'expires_utc': expires_utc,
+            'secure': secure, 'httponly': httponly, 'last_access_utc': last_access_utc, 'has_expires': has_expires,
+            'persistent': persistent, 'priority': priority, 'firstpartyonly': firstpartyonly,
+        }])
+
+
+    @timing.timed('cookies.seed')
+    def setMany(self, cookies):
+        """ Inserts cookies in a single transaction, values are encrypted in one batch
+        :param cookies: iterable of dicts with set() arguments
+        """
+        # [Google Chrome's] timestamp is formatted as the number of microseconds since January, 1601"
+        start_date = datetime(1601, 1, 1, hour=0, minute=0, second=0, microsecond=0, tzinfo=timezone.utc)
 
-        if creation_utc is None:
-            creation_utc = last_access_utc # in microseconds
+        a_year = timedelta(days=365)
+        today = datetime.now(tz=timezone.utc)
+        default_expires_utc = int(((today + a_year) - start_date).total_seconds() * 1000000) * 10 # in microseconds, floating point moved to the right
+        default_last_access_utc = (today - start_date).total_seconds() * 1000000 * 10 # in microseconds, floating point moved to the right
+
+        host_keys = {}
+        rows = []
+        for cookie in cookies:
+            domain = cookie['domain']
+            host_key = host_keys.get(domain)
+            if host_key is None:
+                # domain
+                begins_with_point = domain[0] == '.'
+                host_key = self.hostKeys(domain)[1 if begins_with_point else 0]
+                host_keys[domain] = host_key
+
+            expires_utc = cookie.get('expires_utc')
+            if expires_utc is None:
+                expires_utc = default_expires_utc
+            last_access_utc = cookie.get('last_access_utc')
+            if last_access_utc is None:
+                last_access_utc = default_last_access_utc
+            creation_utc = cookie.get('creation_utc')
+            if creation_utc is None:
+                creation_utc = last_access_utc # in microseconds
+
+            rows.append([creation_utc, host_key, cookie['name'], cookie['value'], cookie.get('path', '/'), expires_utc,
+                         cookie.get('secure', 0), cookie.get('httponly', 0), last_access_utc, cookie.get('has_expires', 1),
+                         cookie.get('persistent', 1), cookie.get('priority', 1), None, cookie.get('firstpartyonly', 0)])
 
         # encrypt
-        encrypted_value = self.encrypt(value)
+        for row, encrypted_value in zip(rows, self.encryptMany([row[3] for row in rows])):
+            row[12] = Binary(encrypted_value)
 
-        query = """
+        query = self.statement("""
                 INSERT INTO {}(creation_utc, host_key, name, value, path, expires_utc, secure, httponly, last_access_utc, has_expires, persistent, priority, encrypted_value, firstpartyonly) 
                 VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?);
-                """.format(self.db_table)
-        values = (creation_utc, host_key, name, value, path, expires_utc, secure, httponly, last_access_utc, has_expires, persistent, priority, Binary(encrypted_value), firstpartyonly)
-        cookie = self.db_cursor.execute(query, values);
+                """)
+        self.db_cursor.executemany(query, rows)
         self.db_connection.commit()
 
 
     def encrypt(self, decrypted_value):
-
+        """ Encrypts one value with the native CBC mode, chaining in lockstep only pays off on batches
+        """
         if not decrypted_value:
             raise ValueError('Cookies.encrypt(): decrypted_value argument not valid')
 
-        # work with bytes
-        decrypted_value = decrypted_value.encode('utf-8')
+        data = decrypted_value.encode('utf-8')
+        length = BLOCK - (len(data) % BLOCK)
+        data += bytes([length]) * length
+        return b'v10' + AES.new(self.key, AES.MODE_CBC, IV=self.iv).encrypt(data)
 
-        # add padding
-        length = 16 - (len(decrypted_value) % 16)
-        decrypted_value += bytes([length])*length
 
-        cipher = AES.new(self.key, AES.MODE_CBC, IV=self.iv)
-        encrypted = cipher.encrypt(decrypted_value)
+    @timing.timed('cookies.decrypt')
+    def decrypt(self, encrypted_value):
+        """ Decrypts one value. CBC decryption has no chaining to do: one call on the cached ECB cipher
+            is cheaper than a native CBC cipher, whose key schedule is built again for every value
+        """
+        message = encrypted_value[3:]
+        if not message:
+            return ''
+        value = xor(blockCipher(self.key).decrypt(message), self.iv + message[:-BLOCK])
+        return value[:-value[-1]].decode('utf8')
+
+
+    @timing.timed('cookies.encrypt')
+    def encryptMany(self, decrypted_values):
+        """ Encrypts values like Chromium does: AES-128-CBC, PKCS7 padding, 'v10' prefix.
+            Messages are chained in lockstep, block n of every message is encrypted in one call.
+        :param decrypted_values: list of strings
+        :return: list of bytes
+        """
+        blocks = []
+        for decrypted_value in decrypted_values:
+            if not decrypted_value:
+                raise ValueError('Cookies.encrypt(): decrypted_value argument not valid')
+
+            # work with bytes, add padding
+            data = decrypted_value.encode('utf-8')
+            length = BLOCK - (len(data) % BLOCK)
+            data += bytes([length]) * length
+            blocks.append([data[i:i + BLOCK] for i in range(0, len(data), BLOCK)])
+
+        cipher = blockCipher(self.key)
+        previous = [self.iv] * len(blocks)
+        encrypted = [[] for _ in blocks]
+        for position in range(max((len(message) for message in blocks), default=0)):
+            indexes = [index for index, message in enumerate(blocks) if position < len(message)]
+            plain = b''.join(blocks[index][position] for index in indexes)
+            chained = xor(plain, b''.join(previous[index] for index in indexes))
+            result = cipher.encrypt(chained)
+            for n, index in enumerate(indexes):
+                block = result[n * BLOCK:(n + 1) * BLOCK]
+                encrypted[index].append(block)
+                previous[index] = block
 
         # add prefix
-        encrypted_value = b"".join([b"v10", encrypted])
-
-        return encrypted_value
+        return [b''.join([b'v10'] + message) for message in encrypted]
 
 
-    def decrypt(self, encrypted_value):
+    @timing.timed('cookies.decrypt')
+    def decryptMany(self, encrypted_values):
+        """ Decrypts values encrypted by Chromium, the whole batch is deciphered in one call
+        :param encrypted_values: list of bytes
+        :return: list of strings
+        """
         # Encrypted cookies should be prefixed with 'v10' according to the
         # Chromium code. Strip it off.
-        encrypted_value = encrypted_value[3:]
+        messages = [encrypted_value[3:] for encrypted_value in encrypted_values]
+
+        # in CBC, a plain block is the deciphered block xor the previous cipher block
+        data = b''.join(messages)
+        previous = b''.join(self.iv + message[:-BLOCK] for message in messages if message)
+        plain = xor(blockCipher(self.key).decrypt(data), previous) if data else b''
 
         # Strip padding by taking off number indicated by padding
         # eg if last is '\x0e' then ord('\x0e') == 14, so take off 14.
-        def clean(x):
-            return x[:-x[-1]].decode('utf8')
+        decrypted = []
+        offset = 0
+        for message in messages:
+            value = plain[offset:offset + len(message)]
+            offset += len(message)
+            decrypted.append(value[:-value[-1]].decode('utf8') if value else '')
 
-        cipher = AES.new(self.key, AES.MODE_CBC, IV=self.iv)
-        decrypted = cipher.decrypt(encrypted_value)
-
-        return clean(decrypted)
+        return decrypted
 
 
+    @timing.timed('cookies.parse')
     def getDeviceIdsFromCookie(self, cookie):
-        rawValue = cookie['value']
-        separator_first = '='
-        separator_third = '%3D'
-        pattern = 'di(?:=|%3D)([0-9]+\.[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12})+'
-
-        p = re.compile(pattern)
-        devices = p.findall(rawValue)
-
-        return devices
+        return deviceid.deviceIds(cookie['value'])
 
 
 
@@ -154,136 +286,344 @@ class Chromium:
         self.prefs_file = '{}/Default/Preferences'.format(profile_folder)
         self.prefs = None
         self.cookie_behavior = None
-        self.command = '/usr/bin/chromium-browser --user-data-dir={}'.format(self.profile_folder)
+        self.binary = '/usr/bin/chromium-browser'
+        self.command = '{} --user-data-dir={}'.format(self.binary, self.profile_folder)
+        self.process = None
+        self.session = None
 
 
-    def openUrl(self, target_url, timeout=3):
-        cmd = '{} {}'.format(self.command, target_url)
-        proc = subprocess.Popen(cmd.split(), stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
-        try:
-            proc.wait(timeout=timeout)
-        except subprocess.TimeoutExpired:
-            proc.terminate()
+    @timing.timed('browser.launch')
+    def startSession(self):
+        """ Starts one headless browser, reused by every openUrl() until stopSession().
+            Preferences are read at startup: set the cookie policy before starting a session.
+            Cookies then live in the browser, use resetCookies(), setCookies() and getCookieValue() instead of Cookies
+        """
+        if not self.session:
+            self.session = devtools.DevToolsSession(self.profile_folder, self.binary)
+            self.session.start()
+
+
+    def stopSession(self):
+        if self.session:
+            self.session.stop()
+            self.session = None
+
+
+    def resetCookies(self):
+        """ Deletes every cookie of the session browser, through the protocol: the cookie database
+            can't be restored under a running browser
+        """
+        self.session.clearCookies()
+
+
+    def setCookies(self, cookies):
+        """ Adds cookies to the session browser
+        :param cookies: iterable of dicts with name, value and domain, as given to Cookies.setMany().
+                        A domain starting with a dot makes a domain cookie, a host-only cookie otherwise
+        """
+        expires = time.time() + 365 * 24 * 3600
+        params = []
+        for cookie in cookies:
+            param = {'name': cookie['name'], 'value': cookie['value'], 'path': cookie.get('path', '/'), 'expires': expires}
+            if cookie['domain'][0] == '.':
+                param['domain'] = cookie['domain']
+            else:
+                param['url'] = 'http://{}/'.format(cookie['domain'])
+            params.append(param)
+        self.session.setCookies(params)
+
+
+    def getCookieValue(self, name, domain):
+        """ Value of a cookie of the session browser, matched like Cookies.get()
+        :param name: cookie name
+        :param domain: domain or url
+        :return: string, None when there is no such cookie
+        """
+        host_key = domains.registrable(domain)
+        host_keys = (host_key, '.{}'.format(host_key))
+        for cookie in self.session.getCookies():
+            if cookie['name'] == name and cookie['domain'] in host_keys:
+                return cookie['value']
+        return None
+
+
+    @timing.timed('browser.load')
+    def openUrl(self, target_url, timeout=3, wait_for=None, settle=0.5, interval=0.05):
+        """ Opens an url in a new browser process, or in the session browser once startSession() was called,
+            and waits until the page is done
+        :param target_url: url to open
+        :param timeout: seconds to wait at most, the browser process is terminated then
+        :param wait_for: callable polled while the page loads, returning True once it is done,
+                         e.g. adsp logged the request of the test. Without it, waits for the browser process to exit,
+                         or for the page load event in a session
+        :param settle: seconds the browser keeps running after wait_for() is True, so the page handles the response
+        :param interval: seconds between two wait_for() calls
+        :return: pageload.PageLoad with timing data
+        """
+        result = pageload.PageLoad(target_url)
+        if self.session:
+            # the session browser opens the url and keeps running
+            loaded = self.session.navigate(target_url, timeout, wait=wait_for is None)
+            if wait_for is None:
+                return result.finish('load' if loaded else 'timeout')
+        else:
+            cmd = '{} {}'.format(self.command, target_url)
+            with timing.span('browser.launch'):
+                self.process = subprocess.Popen(cmd.split(), stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+            if wait_for is None:
+                try:
+                    self.process.wait(timeout=timeout)
+                except subprocess.TimeoutExpired:
+                    self.close()
+                    return result.finish('timeout')
+                return result.finish('exit')
+
+        # the url may be handed over to a browser already running on the profile, which makes ours exit:
+        # poll until the signal or the timeout
+        while not wait_for():
+            if result.elapsed() >= timeout:
+                self.close()
+                return result.finish('timeout')
+            time.sleep(interval)
+
+        time.sleep(settle)
+        # a terminated browser writes its cookies before exiting
+        self.close()
+        return result.finish('signal')
+
+
+    def running(self):
+        """ Tells whether the browser process of the last openUrl() is still running
+        """
+        return self.process is not None and self.process.poll() is None
 
 
     def close(self):
-        if self.process:
+        """ Terminates the browser process of the last openUrl(), if still running
+        """
+        if self.process and self.process.poll() is None:
             self.process.terminate()
+            try:
+                self.process.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
 
 
-    def loadPreferences(self):
-        if not self.prefs:
-            with open(self.prefs_file, mode='r', encoding='utf-8') as f:
-                self.prefs = json.load(f)
-
+    @contextmanager
+    def editPreferences(self):
+        """ Groups preference changes: Preferences file is written once, when the outermost block exits
+        :return: Preferences
+        """
+        if self.prefs and self.prefs.editing:
+            yield self.prefs
+            return
 
-    def savePreferences(self):
-        if self.prefs:
-            with open(self.prefs_file, mode='w', encoding='utf-8') as f:
-                json.dump(self.prefs, f)
+        prefs = self.readPreferences()
+        prefs.editing = True
+        try:
+            yield prefs
+            prefs.save()
+        except BaseException:
+            # half done edits must not be written by a later save()
+            prefs.discard()
+            raise
+        finally:
+            prefs.editing = False
+
+
+    def readPreferences(self):
+        """ Preferences to read from, loaded again only when the file changed.
+            Inside editPreferences(), the edits made so far are seen.
+        :return: Preferences
+        """
+        if not self.prefs:
+            self.prefs = Preferences(self.prefs_file)
+        if not self.prefs.editing:
+            self.prefs.load()
+        return self.prefs
 
 
     def blacklist(self, domain=None):
         """ Blacklist a domain
         :param domain: string domain to blacklist
         """
+        with self.editPreferences() as prefs:
+            prefs.blacklist(domain)
 
-        if not domain:
-            raise ValueError("Chromium.blacklist(): domain argument must be a valid domain")
 
-        if not self.prefs:
-            self.loadPreferences()
+    def blacklisted(self):
+        """ Blacklisted domains
+        :return: list of base domains
+        """
+        return self.readPreferences().blacklisted()
 
-        # be sure that content settings keys exist
-        if 'cookies' not in self.prefs['profile']['content_settings']['exceptions'].keys():
-            self.prefs['profile']['content_settings']['exceptions'].update({'cookies': {}})
 
-        if 'pattern_pairs' not in self.prefs['profile']['content_settings'].keys():
-            self.prefs['profile']['content_settings'].update({'pattern_pairs': {}})
+    def cookieBehavior(self):
+        """ Current cookies privacy settings
+        :return: string (all|only_1|nothing)
+        """
+        return self.readPreferences().cookieBehavior()
 
-        if 'http' not in domain:
-            domain = 'http://{}'.format(domain)
-        parsed_domain = urllib.parse.urlparse(domain).netloc 
-        base_domain = '.'.join(parsed_domain.split('.')[-2:])
 
-        self.prefs['profile']['content_settings']['exceptions']['cookies'].update({'{},*'.format(base_domain):{'setting': 2}})
-        self.prefs['profile']['content_settings']['pattern_pairs'].update({'{},*'.format(base_domain):{'cookies': 2}})
+    def flushBlacklist(self):
+        """ Flushes existing blacklist
+        """
+        with self.editPreferences() as prefs:
+            prefs.flushBlacklist()
 
-        self.savePreferences()
 
+    def setCookieBehavior(self, cookie_behavior=None):
+        """ Sets browser's cookies privacy settings
+        :param cookie_behavior: string (all|only_1|visited|nothing)
+        :param blacklist_domain: string domain to blacklist
+        """
+        self.backupPreferences(self.prefs_file);
 
-    def flushBlacklist(self):
-        """ Flushes existing blacklist
+        with self.editPreferences() as prefs:
+            prefs.setCookieBehavior(cookie_behavior)
+
+
+    def backupPreferences(self, filename):
+        """ Keeps the pristine content of a file, stored once by content hash
+        :param filename: full path to file being backuped
         """
+        backups.Backup(filename).save()
 
-        if not self.prefs:
-            self.loadPreferences()
 
-        # be sure that content settings keys exist
-        if 'cookies' not in self.prefs['profile']['content_settings']['exceptions'].keys():
-            self.prefs['profile']['content_settings']['exceptions'].update({'cookies': {}})
-        else:
-            self.prefs['profile']['content_settings']['exceptions']['cookies'] = {}
+    def restorePreferences(self, filename):
+        """ Puts the pristine content of a file back, if it changed since backupPreferences()
+        :param filename: full path to file being restored
+        """
+        backups.Backup(filename).restore()
 
-        if 'pattern_pairs' not in self.prefs['profile']['content_settings'].keys():
-            self.prefs['profile']['content_settings'].update({'pattern_pairs': {}})
-        else:
-            self.prefs['profile']['content_settings']['pattern_pairs'] = {}
 
-        self.savePreferences()
 
+class Preferences:
+    """ Chromium Preferences file held in memory: loaded once, read again only when the file changed on disk,
+        written back through a temporary file and os.replace(), and only if an edit changed something.
+    """
 
-    def setCookieBehavior(self, cookie_behavior=None):
-        """ Sets browser's cookies privacy settings
-        :param cookie_behavior: string (all|only_1|visited|nothing)
-        :param blacklist_domain: string domain to blacklist
+    def __init__(self, filename):
+        self.filename = filename
+        self.prefs = None
+        # serialized content as last read or written, tells whether save() has something to do
+        self.saved = None
+        self.stat = None
+        self.editing = False
+
+
+    def fileStat(self):
+        stat = os.stat(self.filename)
+        return (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+
+
+    def load(self):
+        stat = self.fileStat()
+        if self.prefs is not None and stat == self.stat:
+            return
+        with open(self.filename, mode='r', encoding='utf-8') as f:
+            self.saved = f.read()
+        self.prefs = json.loads(self.saved)
+        self.saved = json.dumps(self.prefs)
+        self.stat = stat
+
+
+    def discard(self):
+        """ Forgets the in memory copy, next load() reads the file again
         """
-        allowed = ['all', 'only_1', 'nothing']
+        self.prefs = None
+        self.saved = None
+        self.stat = None
 
-        behavior = 'all'
-        if cookie_behavior in allowed:
-            behavior = cookie_behavior
 
-        self.backupPreferences(self.prefs_file);
+    def save(self):
+        """ Writes preferences back
+        :return: bool False when nothing changed and the file was left untouched
+        """
+        content = json.dumps(self.prefs)
+        if content == self.saved:
+            return False
 
-        if not self.prefs:
-            self.loadPreferences()
+        tmp_file = '{}.tmp'.format(self.filename)
+        with open(tmp_file, mode='w', encoding='utf-8') as f:
+            f.write(content)
+        os.replace(tmp_file, self.filename)
+        self.saved = content
+        self.stat = self.fileStat()
+        return True
 
-        # be sure that content settings keys exist
-        if 'block_third_party_cookies' not in self.prefs['profile'].keys():
-            self.prefs['profile'].update({'block_third_party_cookies': False})
 
-        #if 'default_content_setting_values' not in self.prefs['profile'].keys():
-        self.prefs['profile'].update({'default_content_setting_values': {}})
+    def contentSettings(self):
+        """ Content settings dict, with cookies exceptions and pattern pairs keys created if missing
+        """
+        content_settings = self.prefs['profile']['content_settings']
+        content_settings['exceptions'].setdefault('cookies', {})
+        content_settings.setdefault('pattern_pairs', {})
+        return content_settings
 
-        #if 'default_content_settings' not in self.prefs['profile'].keys():
-        self.prefs['profile'].update({'default_content_settings': {}})
 
-        # third party cookies
-        if behavior == 'only_1':
-            self.prefs['profile']['block_third_party_cookies'] = True
-        else:
-            self.prefs['profile']['block_third_party_cookies'] = False
+    def blacklist(self, domain=None):
+        """ Blacklist a domain
+        :param domain: string domain to blacklist
+        """
+        if not domain:
+            raise ValueError("Chromium.blacklist(): domain argument must be a valid domain")
 
-        # block all
-        if behavior == 'nothing':
-            self.prefs['profile']['default_content_setting_values']['cookies'] = 2
-            self.prefs['profile']['default_content_settings']['cookies'] = 2
+        content_settings = self.contentSettings()
+        base_domain = domains.registrable(domain)
 
-        self.savePreferences()
+        content_settings['exceptions']['cookies'].update({'{},*'.format(base_domain):{'setting': 2}})
+        content_settings['pattern_pairs'].update({'{},*'.format(base_domain):{'cookies': 2}})
 
 
-    def backupPreferences(self, filename):
-        """ Copies a file to the same location with a trailing .bak extension
-        :param filename: full path to file being backuped
+    def blacklisted(self):
+        """ Blacklisted domains
+        :return: list of base domains
         """
-        shutil.copy(filename, '{}.bak'.format(filename))
+        exceptions = self.prefs['profile']['content_settings']['exceptions'].get('cookies', {})
+        return [pattern.split(',')[0] for pattern, setting in exceptions.items() if setting.get('setting') == 2]
 
 
-    def restorePreferences(self, filename):
-        """ Copies a backuped file to the same location without the trailing .bak extension
-        :param filename: full path to file being restored
+    def flushBlacklist(self):
+        """ Flushes existing blacklist
         """
-        shutil.copy('{}.bak'.format(filename), filename)
+        content_settings = self.contentSettings()
+        content_settings['exceptions']['cookies'] = {}
+        content_settings['pattern_pairs'] = {}
 
 
+    def setCookieBehavior(self, cookie_behavior=None):
+        """ Sets browser's cookies privacy settings
+        :param cookie_behavior: string (all|only_1|nothing)
+        """
+        allowed = ['all', 'only_1', 'nothing']
+
+        behavior = 'all'
+        if cookie_behavior in allowed:
+            behavior = cookie_behavior
+
+        profile = self.prefs['profile']
+
+        # third party cookies
+        profile['block_third_party_cookies'] = behavior == 'only_1'
+
+        profile['default_content_setting_values'] = {}
+        profile['default_content_settings'] = {}
+
+        # block all
+        if behavior == 'nothing':
+            profile['default_content_setting_values']['cookies'] = 2
+            profile['default_content_settings']['cookies'] = 2
+
+
+    def cookieBehavior(self):
+        """ Current cookies privacy settings
+        :return: string (all|only_1|nothing)
+        """
+        profile = self.prefs['profile']
+        if profile.get('default_content_setting_values', {}).get('cookies') == 2:
+            return 'nothing'
+        if profile.get('block_third_party_cookies'):
+            return 'only_1'
+        return 'all'
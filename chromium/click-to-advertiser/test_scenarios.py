@@ -0,0 +1,14 @@
+#!/usr/bin/env python3
+
+import test_chromium
+from common import scenarios
+import unittest
+
+# one TestCase per cookie policy (TestChromiumAcceptAllCookies, ...), tests and expectations come from common/matrix.py
+globals().update(scenarios.testCases(test_chromium.TestChromium, 'chromium', 'click-to-advertiser', __name__))
+
+
+
+
+if __name__ == '__main__':
+        unittest.main()
@@ -0,0 +1,180 @@
+import os
+import json
+import queue
+import itertools
+import threading
+import subprocess
+
+
+class DevToolsError(Exception):
+    pass
+
+
+class DevToolsSession:
+    """ Long lived headless Chromium driven over the DevTools protocol.
+        Uses --remote-debugging-pipe: commands are written to fd 3 of the browser, responses and
+        events are read from its fd 4, messages are json terminated by a null byte.
+    """
+
+    def __init__(self, profile_folder, binary='/usr/bin/chromium-browser', headless=True, extra_args=None):
+        self.profile_folder = profile_folder
+        self.binary = binary
+        self.headless = headless
+        self.extra_args = extra_args or []
+        self.process = None
+        self.ids = itertools.count(1)
+        # message id -> queue receiving the response
+        self.pending = {}
+        self.pending_lock = threading.Lock()
+        # commands are written by the calling threads, a message must not be interleaved with another
+        self.write_lock = threading.Lock()
+        # event listeners, functions called with (method, params, sessionId) from the reader thread
+        self.listeners = []
+        self.page_session = None
+        self.reader = None
+
+
+    def start(self):
+        cmd_read, cmd_write = os.pipe()
+        res_read, res_write = os.pipe()
+
+        def pipes():
+            # pipes may already sit on fd 3 or 4, move them away before placing them
+            command, response = os.dup(cmd_read), os.dup(res_write)
+            os.dup2(command, 3)
+            os.dup2(response, 4)
+
+        args = [self.binary, '--user-data-dir={}'.format(self.profile_folder), '--remote-debugging-pipe', '--no-first-run', '--no-default-browser-check']
+        if self.headless:
+            args.append('--headless')
+        args.extend(self.extra_args)
+        args.append('about:blank')
+
+        self.process = subprocess.Popen(args, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, close_fds=False, preexec_fn=pipes)
+        os.close(cmd_read)
+        os.close(res_write)
+        self.output = os.fdopen(cmd_write, 'wb', buffering=0)
+        self.input = os.fdopen(res_read, 'rb', buffering=0)
+
+        self.reader = threading.Thread(target=self.read, daemon=True)
+        self.reader.start()
+
+        target = self.send('Target.createTarget', {'url': 'about:blank'})
+        attached = self.send('Target.attachToTarget', {'targetId': target['targetId'], 'flatten': True})
+        self.page_session = attached['sessionId']
+        self.send('Page.enable', session=self.page_session)
+        self.send('Network.enable', session=self.page_session)
+
+
+    def read(self):
+        buf = b''
+        while True:
+            chunk = self.input.read(65536)
+            if not chunk:
+                break
+            buf += chunk
+            while b'\0' in buf:
+                raw, buf = buf.split(b'\0', 1)
+                self.dispatch(json.loads(raw.decode('utf-8')))
+
+        # browser is gone, wake up every waiting command
+        with self.pending_lock:
+            for waiting in self.pending.values():
+                waiting.put({'error': {'message': 'browser exited'}})
+            self.pending = {}
+
+
+    def dispatch(self, message):
+        if 'id' in message:
+            with self.pending_lock:
+                waiting = self.pending.pop(message['id'], None)
+            if waiting:
+                waiting.put(message)
+            return
+        for listener in list(self.listeners):
+            listener(message.get('method'), message.get('params', {}), message.get('sessionId'))
+
+
+    def send(self, method, params=None, session=None, timeout=30):
+        """ Sends a command and waits for its response, from any thread
+        :param method: DevTools method, e.g. 'Page.navigate'
+        :param params: dict
+        :param session: target session id, browser target when None
+        :return: dict result
+        """
+        message_id = next(self.ids)
+        message = {'id': message_id, 'method': method, 'params': params or {}}
+        if session:
+            message['sessionId'] = session
+
+        waiting = queue.Queue()
+        with self.pending_lock:
+            self.pending[message_id] = waiting
+        with self.write_lock:
+            self.output.write(json.dumps(message).encode('utf-8') + b'\0')
+
+        try:
+            response = waiting.get(timeout=timeout)
+        except queue.Empty:
+            with self.pending_lock:
+                self.pending.pop(message_id, None)
+            raise DevToolsError('{} timed out'.format(method))
+        if 'error' in response:
+            raise DevToolsError('{}: {}'.format(method, response['error'].get('message')))
+        return response.get('result', {})
+
+
+    def navigate(self, url, timeout=30, wait=False):
+        """ Opens url in the page
+        :param url: url to open
+        :param timeout: seconds to wait at most
+        :param wait: wait for the load event of the page
+        :return: bool False when the load event did not fire in time
+        """
+        loaded = threading.Event()
+
+        def listener(method, params, session):
+            if session == self.page_session and method == 'Page.loadEventFired':
+                loaded.set()
+
+        if wait:
+            self.listeners.append(listener)
+        try:
+            self.send('Page.navigate', {'url': url}, session=self.page_session, timeout=timeout)
+            return not wait or loaded.wait(timeout)
+        finally:
+            if wait:
+                self.listeners.remove(listener)
+
+
+    def getCookies(self):
+        """ All cookies of the browser, as DevTools Network.Cookie dicts
+        """
+        return self.send('Storage.getCookies')['cookies']
+
+
+    def setCookies(self, cookies):
+        """ Adds cookies to the browser
+        :param cookies: list of DevTools Network.CookieParam dicts
+        """
+        self.send('Storage.setCookies', {'cookies': cookies})
+
+
+    def clearCookies(self):
+        self.send('Network.clearBrowserCookies', session=self.page_session)
+
+
+    def stop(self):
+        if not self.process:
+            return
+        try:
+            self.send('Browser.close', timeout=5)
+        except (DevToolsError, OSError):
+            pass
+        try:
+            self.process.wait(timeout=5)
+        except subprocess.TimeoutExpired:
+            self.process.terminate()
+            self.process.wait()
+        self.output.close()
+        self.process = None
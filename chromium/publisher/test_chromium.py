@@ -1,12 +1,12 @@
 #!/usr/bin/env python3
 
 from chromium.chromium import *
-from common.adsplog import *
+from common import domains
+from common import scenarios
 import unittest
-import time
 import settings
 
-class TestChromium(unittest.TestCase):
+class TestChromium(scenarios.ScenarioTestCase):
     """ Test suite to test a click on an Ad in publisher's website and a redirect to advertiser's website
         with Chromium browser.
         When a user clicks an Ad it is redirected to adsp with a device id in querystring for ALL tests
@@ -14,113 +14,50 @@ class TestChromium(unittest.TestCase):
         Landing page has a our lib tracker.js, and it triggers a lead automatically.
     """
 
-    def setUp(self):
-
-        time.sleep(settings.wait_before)
+    browser_name = 'chromium'
+    website = settings.publisher
+
+    @classmethod
+    def setup_browser(cls):
+        cls.profile_folder = cls.profile.folder if cls.profile else settings.chromium['profile_folder']
+        cls.browser = Chromium(cls.profile_folder)
+
+
+    def open_cookies(self):
+        db_path = '{}/{}'.format(self.profile_folder, settings.chromium['profile_name'])
+        return Cookies(db_path, settings.chromium['cookie_db'], settings.chromium['cookie_table'])
+
+
+    @classmethod
+    def apply_policy(cls, policy):
+        """ Sets cookie behavior and blacklists, preferences are written once
+        :param policy: dict from common/matrix.py POLICIES
+        """
+        with cls.browser.editPreferences():
+            cls.browser.setCookieBehavior(policy['cookie_behavior'])
+            for party in policy['blacklist']:
+                cls.browser.blacklist(cls.domains[party])
+
+
+    @classmethod
+    def policy_applied(cls, policy):
+        """ Tells whether preferences still match a cookie policy
+        :param policy: dict from common/matrix.py POLICIES
+        """
+        blacklisted = set(domains.registrable(cls.domains[party]) for party in policy['blacklist'])
+        return cls.browser.cookieBehavior() == policy['cookie_behavior'] and blacklisted <= set(cls.browser.blacklisted())
+
+
+    @classmethod
+    def reset_policy(cls, policy):
+        # restore cookie behavior, a leased profile is cloned again by the next class
+        if not cls.profile:
+            cls.browser.restorePreferences(cls.browser.prefs_file)
+
+        # remove blacklist
+        if policy['blacklist']:
+            cls.browser.flushBlacklist()
 
-        # setup adsp log
-        self.adsplog = AdspLog(settings.folder_adsp_logs)
-
-        # setup website
-        self.url = settings.publisher['url']
-        self.timeout = settings.http_get_timeout
-        self.cookie_name = settings.cookie_name
-        self.domains = settings.publisher['domains']
-
-        # setup chromium
-        self.browser = Chromium(settings.chromium['profile_folder'])
-
-        # flush cookies before browsing
-        db_path = '{}/Default'.format(settings.chromium['profile_folder'], settings.chromium['profile_name'])
-        self.cookies = Cookies(db_path, settings.chromium['cookie_db'], settings.chromium['cookie_table'])
-        self.cookies.setup()
-        self.cookies.flush()
-        self.cookies.close()
-
-
-    def fetch_devices(self):
-        # fetch device ids from cookies
-        self.cookies.setup()
-        cookieFirst = self.cookies.get(self.cookie_name, self.domains['first'])
-        cookieThird = self.cookies.get(self.cookie_name, self.domains['third'])
-        self.cookies.close()
-
-        self.devicesFirst = []
-        self.devicesThird = []
-        if cookieFirst:
-            self.devicesFirst = self.cookies.getDeviceIdsFromCookie(cookieFirst)
-        if cookieThird:
-            self.devicesThird = self.cookies.getDeviceIdsFromCookie(cookieThird)
-
-        # fetch device ids from adsp logs
-        self.devicesLogs = []
-        self.devicesLogs = self.adsplog.getDeviceIds(self.adsplog.getLastLine())
-
-
-    def setup_allIsEmpty(self):
-        self.browser.openUrl(self.url, self.timeout)
-        time.sleep(settings.wait_after)
-        self.fetch_devices()
-
-
-    def setup_cookieThirdIsEmpty(self):
-        # fill cookie 1st only
-        self.deviceIdA = '1447859209.11111111-1111-1111-bbbb-111111111111'
-        cookie_value = 'ls=1447859209770|v=1|di={}'.format(self.deviceIdA)
-        self.cookies.setup()
-        self.cookies.set(self.cookie_name, cookie_value, self.domains['first'])
-        self.cookies.close()
-
-        self.browser.openUrl(self.url, self.timeout)
-        time.sleep(settings.wait_after)
-        self.fetch_devices()
-
-
-    def setup_cookieFirstIsEmpty(self):
-        # fill cookie 3rd only
-        self.deviceIdA = '1447859209.33333333-3333-3333-cccc-333333333333'
-        cookie_value = 'ls%3D1447859209000%7Cv%3D1%7Cdi%3D{}'.format(self.deviceIdA)
-        self.cookies.setup()
-        self.cookies.set(self.cookie_name, cookie_value, self.domains['third'])
-        self.cookies.close()
-
-        self.browser.openUrl(self.url, self.timeout)
-        time.sleep(settings.wait_after)
-        self.fetch_devices()
-
-
-    def setup_cookiesContainSameDevice(self):
-        self.deviceIdA = '1447859209.11111111-3333-1111-dddd-111111111111'
-        cookie_value_first = 'ls=1447859209000|v=1|di={}'.format(self.deviceIdA)
-        cookie_value_third = 'ls%3D1447859209000%7Cv%3D1%7Cdi%3D{}'.format(self.deviceIdA)
-        self.cookies.setup()
-        self.cookies.set(self.cookie_name, cookie_value_first, self.domains['first'])
-        self.cookies.set(self.cookie_name, cookie_value_third, self.domains['third'])
-        self.cookies.close()
-
-        self.browser.openUrl(self.url, self.timeout)
-        time.sleep(settings.wait_after)
-        self.fetch_devices()
-
-
-    def setup_cookiesContainDifferentDevices(self):
-        self.deviceIdA = '1447859209.11111111-1111-1111-eeee-111111111111'
-        cookie_value_first = 'ls=1447859209000|v=1|di={}'.format(self.deviceIdA)
-        self.deviceIdB = '1447859209.33333333-3333-3333-eeee-333333333333'
-        cookie_value_third = 'ls%3D1447859209000%7Cv%3D1%7Cdi%3D{}'.format(self.deviceIdB)
-        self.cookies.setup()
-        self.cookies.set(self.cookie_name, cookie_value_first, self.domains['first'])
-        self.cookies.set(self.cookie_name, cookie_value_third, self.domains['third'])
-        self.cookies.close()
-
-        self.browser.openUrl(self.url, self.timeout)
-        time.sleep(settings.wait_after)
-        self.fetch_devices()
-
-
-    def tearDown(self):
-        # restore cookie behavior
-        self.browser.restorePreferences(self.browser.prefs_file)
 
 
 
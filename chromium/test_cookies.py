@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+
+from chromium.chromium import Cookies
+import unittest
+
+
+class TestCookiesCrypto(unittest.TestCase):
+    """ Batch encryption chains every value in lockstep, it must give the same bytes as the single value path.
+        No browser is needed, from repository root: python3 -m unittest chromium.test_cookies
+    """
+
+    # shorter than a block, one block exactly, several blocks, non ascii, adsp plain and url encoded cookie values
+    values = [
+        'a',
+        'x' * 16,
+        'y' * 47,
+        'café à la crème',
+        'ls=1455166371789|v=1|di=1447859209.11111111-1111-1111-bbbb-111111111111',
+        'ls%3D1453626651109%7Cv%3D1%7Cdi%3D1440709944.9558867f-5ba9-1faf-7a02-4204f7c1bd87%7Cdi%3D12.22222222-2222-2222-aaaa-222222222222',
+    ]
+
+    def setUp(self):
+        self.cookies = Cookies('/nonexistent', 'Cookies', 'cookies')
+
+
+    def test_encryptManyMatchesEncrypt(self):
+        self.assertEqual(self.cookies.encryptMany(self.values), [self.cookies.encrypt(value) for value in self.values])
+
+
+    def test_decryptManyMatchesDecrypt(self):
+        encrypted = [self.cookies.encrypt(value) for value in self.values]
+        self.assertEqual(self.cookies.decryptMany(encrypted), [self.cookies.decrypt(value) for value in encrypted])
+
+
+    def test_roundTrip(self):
+        self.assertEqual(self.cookies.decryptMany(self.cookies.encryptMany(self.values)), self.values)
+        self.assertEqual([self.cookies.decrypt(self.cookies.encrypt(value)) for value in self.values], self.values)
+
+
+    def test_emptyValues(self):
+        self.assertEqual(self.cookies.encryptMany([]), [])
+        self.assertEqual(self.cookies.decryptMany([]), [])
+        self.assertEqual(self.cookies.decryptMany([b'v10']), [''])
+        self.assertEqual(self.cookies.decrypt(b''), '')
+        with self.assertRaises(ValueError):
+            self.cookies.encrypt('')
+
+
+
+
+if __name__ == '__main__':
+        unittest.main()
@@ -0,0 +1,329 @@
+#!/usr/bin/env python3
+""" Local stand-in for adsp-front, so the test matrix runs without a real deployment.
+
+    Usage, from repository root:
+
+        python3 -m common.adspfront [--bind 127.0.0.1] [--port 80] [--logs FOLDER]
+
+    Serves, by Host header:
+        publisher.localhost/publisher.html      publisher page with an Ad tag
+        advertiser.localhost/advertiser.html    advertiser page with tracker.js and a lead
+        *.adsp.localhost/advertise.php          Ad tag, reads first party ids and calls display.php
+        *.adsp.localhost/display.php            logs the display, sets cookies
+        *.adsp.localhost/click.php              sets third party cookie, redirects to advertiser
+        *.adsp.localhost/track.php              logs the lead, sets cookies
+        *.adsp.localhost/tracker.js             advertiser library
+
+    Device id rules, for both displays and leads:
+        third party ids = ids in third party cookie, else ids from click querystring,
+                          else ids from first party cookie, else a new id
+        first party ids = third party ids, followed by first party ids not already there
+        logged ids      = first party ids
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import re
+import sys
+import time
+import uuid
+import urllib.parse
+from datetime import datetime
+
+
+COOKIE_NAME = 'adsp_di'
+DEVICE_ID = re.compile(r'di(?:=|%3D)([0-9]+\.[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12})')
+COOKIE_MAX_AGE = 365 * 24 * 3600
+
+# javascript reading device ids of the first party cookie
+FIRST_PARTY_IDS_JS = r"""
+    function adspFirstPartyIds(d) {
+        var m = d.cookie.match(/(?:^|; )adsp_di=([^;]*)/), ids = [], re = /di(?:=|%3D)([0-9]+\.[0-9a-f-]{36})/g, r;
+        while (m && (r = re.exec(m[1]))) { ids.push(r[1]); }
+        return ids;
+    }
+"""
+
+PUBLISHER_HTML = """<html>
+<head>
+        <title>Publisher</title>
+</head>
+<body>
+        <h1>Publisher</h1>
+
+        <!-- website test -->
+        <script type="text/javascript" src="http://www2.{adsp}/advertise.php?live-test=true&website-id=5069&campaign-id=2763&ad-asset-id=21915&type=10&width=160&height=600&action=unique"></script>
+</body>
+</html>
+"""
+
+ADVERTISER_HTML = """<html>
+<head>
+        <title>Advertiser</title>
+</head>
+<body>
+        <h1>Advertiser</h1>
+
+        <!-- Adsp - Master tag - To include before </head> -->
+        <script type="text/javascript">
+                (function(d, w) {{
+                var e = d.createElement("script"), s = d.getElementsByTagName("script")[0], p = d.location.protocol === 'https:' ? 'https:' : 'http:';
+                e.type = "text/javascript"; e.async = true; e.src = p + "//js.{adsp}/tracker.js";
+                s.parentNode.insertBefore(e, s);
+                w._adspq = w._adspq || [];
+                }})(document, window);
+        </script>
+        <!-- / End of Master tag -->
+
+        <!-- Adsp - Event tag - Leads - Javascript -->
+        <script type="text/javascript">
+                function track(type) {{
+                        var userId = 'user-' + (Math.random() * 10000000000000000);
+                        _adspq.push(["trackEvent", {{
+                        _trackerId: 87,
+                        type: "inscription",
+                        userId: userId
+                        }}]);
+                }}
+        </script>
+        <!-- / End of Event tag -->
+
+        <input id='btnMakeLead' type="button" value="Make a lead" onClick="track('inscription');"/>
+
+        <!-- For automated tests, make a lead -->
+        <script type="text/javascript">
+                track('inscription');
+        </script>
+</body>
+</html>
+"""
+
+ADVERTISE_JS = """
+    document.write('<script type="text/javascript" src="//{host}/display.php?{query}&fp=' + encodeURIComponent(adspFirstPartyIds(document).join(',')) + '"><\\/script>');
+"""
+
+TRACKER_JS = """
+    (function(w, d) {{
+        function thirdPartyIds() {{
+            var m = w.location.search.match(/[?&]adsp_di=([^&]*)/);
+            return m ? decodeURIComponent(m[1]).split(',') : [];
+        }}
+        function trackEvent(e) {{
+            var s = d.createElement('script');
+            s.src = '//www2.{adsp}/track.php?tracker-id=' + encodeURIComponent(e._trackerId) + '&type=' + encodeURIComponent(e.type)
+                + '&user-id=' + encodeURIComponent(e.userId) + '&fp=' + encodeURIComponent(adspFirstPartyIds(d).join(','))
+                + '&tp=' + encodeURIComponent(thirdPartyIds().join(','));
+            d.getElementsByTagName('script')[0].parentNode.appendChild(s);
+        }}
+        var queue = w._adspq || [];
+        w._adspq = {{push: function(item) {{ if (item[0] === 'trackEvent') {{ trackEvent(item[1]); }} }}}};
+        for (var i = 0; i < queue.length; i++) {{ w._adspq.push(queue[i]); }}
+    }})(window, document);
+"""
+
+REASONS = {200: 'OK', 302: 'Found', 404: 'Not Found', 400: 'Bad Request'}
+
+
+def newDeviceId():
+    return '{}.{}'.format(int(time.time()), uuid.uuid4())
+
+
+def deviceIds(value):
+    """ Device ids of a cookie value or comma separated list, url encoded or not
+    """
+    if not value:
+        return []
+    found = DEVICE_ID.findall(value)
+    if found:
+        return found
+    return [device for device in value.split(',') if device]
+
+
+def resolve(first, third):
+    """ Applies device id rules
+    :param first: list of first party ids
+    :param third: list of third party ids, from cookie or querystring
+    :return: (first party ids, third party ids)
+    """
+    if not third:
+        third = list(first) or [newDeviceId()]
+    merged = list(third) + [device for device in first if device not in third]
+    return merged, third
+
+
+def cookieValue(devices, encoded):
+    value = 'ls={}|v=1|{}'.format(int(time.time() * 1000), '|'.join('di={}'.format(device) for device in devices))
+    if encoded:
+        return urllib.parse.quote(value, safe='')
+    return value
+
+
+class AccessLog:
+    """ Writes adsp access log lines: 13 comma separated columns followed by a json payload,
+        into FOLDER/year/month/day/hour/access.log as AdspLog expects.
+    """
+
+    def __init__(self, folder):
+        self.folder = folder
+        self.filename = None
+        self.handle = None
+
+
+    def write(self, columns, data):
+        now = datetime.today()
+        folder = '{}/{}/{}/{}/{}'.format(self.folder, now.year, now.month, now.day, now.hour)
+        filename = '{}/access.log'.format(folder)
+        if filename != self.filename:
+            if self.handle:
+                self.handle.close()
+            os.makedirs(folder, exist_ok=True)
+            self.handle = open(filename, 'a', encoding='utf-8')
+            self.filename = filename
+
+        columns = [now.strftime('%Y-%m-%d %H:%M:%S')] + [str(column).replace(',', ' ') for column in columns]
+        self.handle.write('{},{}\n'.format(','.join(columns), json.dumps(data)))
+        self.handle.flush()
+
+
+class AdspFront:
+
+    def __init__(self, logs_folder, publisher_host='publisher.localhost', advertiser_host='advertiser.localhost', adsp_domain='adsp.localhost'):
+        self.log = AccessLog(logs_folder)
+        self.publisher_host = publisher_host
+        self.advertiser_host = advertiser_host
+        self.adsp_domain = adsp_domain
+
+
+    async def handle(self, reader, writer):
+        peer = writer.get_extra_info('peername') or ('-',)
+        try:
+            while True:
+                head = await reader.readuntil(b'\r\n\r\n')
+                lines = head.decode('latin-1').split('\r\n')
+                try:
+                    method, target, version = lines[0].split(' ', 2)
+                except ValueError:
+                    break
+                headers = {}
+                for line in lines[1:]:
+                    if ':' in line:
+                        name, value = line.split(':', 1)
+                        headers[name.strip().lower()] = value.strip()
+                length = int(headers.get('content-length', 0) or 0)
+                if length:
+                    await reader.readexactly(length)
+
+                status, response_headers, body = self.route(method, target, headers, peer[0])
+                keep_alive = version == 'HTTP/1.1' and headers.get('connection', '').lower() != 'close'
+
+                out = ['HTTP/1.1 {} {}'.format(status, REASONS.get(status, ''))]
+                out.extend('{}: {}'.format(name, value) for name, value in response_headers)
+                out.append('Content-Length: {}'.format(len(body)))
+                out.append('Cache-Control: no-store')
+                out.append('Connection: {}'.format('keep-alive' if keep_alive else 'close'))
+                writer.write(('\r\n'.join(out) + '\r\n\r\n').encode('latin-1') + body)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+
+    def route(self, method, target, headers, ip):
+        host_header = headers.get('host', '')
+        host, _, port = host_header.partition(':')
+        # keep the port in generated urls when not running on 80
+        suffix = ':{}'.format(port) if port and port != '80' else ''
+        adsp = self.adsp_domain + suffix
+
+        parsed = urllib.parse.urlsplit(target)
+        path = parsed.path
+        query = urllib.parse.parse_qs(parsed.query)
+
+        if host == self.publisher_host and path in ('/', '/publisher.html'):
+            return 200, [('Content-Type', 'text/html; charset=utf-8')], PUBLISHER_HTML.format(adsp=adsp).encode('utf-8')
+
+        if host == self.advertiser_host and path in ('/', '/advertiser.html'):
+            return 200, [('Content-Type', 'text/html; charset=utf-8')], ADVERTISER_HTML.format(adsp=adsp).encode('utf-8')
+
+        if host == self.adsp_domain or host.endswith('.' + self.adsp_domain):
+            third = deviceIds(self.cookie(headers))
+            context = (ip, host_header, method, path, headers.get('referer', '-'), headers.get('user-agent', '-'))
+
+            if path == '/tracker.js':
+                body = FIRST_PARTY_IDS_JS + TRACKER_JS.format(adsp=adsp)
+                return 200, [('Content-Type', 'application/javascript')], body.encode('utf-8')
+
+            if path == '/advertise.php':
+                body = FIRST_PARTY_IDS_JS + ADVERTISE_JS.format(host=host_header, query=parsed.query)
+                return 200, [('Content-Type', 'application/javascript')], body.encode('utf-8')
+
+            if path == '/click.php':
+                third = third or deviceIds(first(query, 'di')) or [newDeviceId()]
+                # id is campaign-asset-website, the click carries no device ids, the lead on advertiser side does
+                campaign, asset, website = (first(query, 'id').split('-') + ['', '', ''])[:3]
+                self.log.write(context + (302, 'click', campaign, website, asset, ''), {'type': 'click'})
+                location = 'http://{}{}/advertiser.html?{}'.format(self.advertiser_host, suffix, urllib.parse.urlencode({COOKIE_NAME: ','.join(third)}))
+                return 302, [('Location', location), self.setCookie(third)], b''
+
+            if path in ('/display.php', '/track.php'):
+                requested = third or deviceIds(first(query, 'tp'))
+                devices, third = resolve(deviceIds(first(query, 'fp')), requested)
+                event = 'display' if path == '/display.php' else 'lead'
+                ids = (first(query, 'campaign-id'), first(query, 'website-id'), first(query, 'ad-asset-id'), first(query, 'tracker-id'))
+                self.log.write(context + (200, event) + ids, {'type': event, 'deviceIds': devices})
+                body = "document.cookie = '{}={}; path=/; max-age={}';".format(COOKIE_NAME, cookieValue(devices, False), COOKIE_MAX_AGE)
+                return 200, [('Content-Type', 'application/javascript'), self.setCookie(third)], body.encode('utf-8')
+
+        return 404, [('Content-Type', 'text/plain')], b'not found'
+
+
+    def cookie(self, headers):
+        for pair in headers.get('cookie', '').split(';'):
+            name, _, value = pair.strip().partition('=')
+            if name == COOKIE_NAME:
+                return value
+        return ''
+
+
+    def setCookie(self, devices):
+        value = '{}={}; Domain=.{}; Path=/; Max-Age={}'.format(COOKIE_NAME, cookieValue(devices, True), self.adsp_domain, COOKIE_MAX_AGE)
+        return ('Set-Cookie', value)
+
+
+    async def serve(self, bind='127.0.0.1', port=80):
+        server = await asyncio.start_server(self.handle, bind, port, backlog=1024)
+        async with server:
+            await server.serve_forever()
+
+
+def first(query, name):
+    values = query.get(name)
+    return values[0] if values else ''
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python3 -m common.adspfront', description='Local stand-in adsp-front server.')
+    parser.add_argument('--bind', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=80)
+    parser.add_argument('--logs', default=None, help='access logs base folder, settings.folder_adsp_logs by default')
+    args = parser.parse_args(argv)
+
+    logs = args.logs
+    if logs is None:
+        import settings
+        logs = settings.folder_adsp_logs
+
+    try:
+        asyncio.run(AdspFront(logs).serve(args.bind, args.port))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,7 +1,70 @@
-import subprocess
 import sys
+import os
 import json
+import time
 from datetime import datetime
+from common import logwatcher
+from common import logindex
+from common import timing
+
+
+class LogFiles:
+    """ Index of the log files of the hourly folders, kept up to date with os.scandir.
+        Folders are listed again only when their mtime changed, known files are just stat'ed.
+    """
+
+    def __init__(self, base_folder, max_age=60, excluded=('debug.log',)):
+        self.base_folder = base_folder
+        self.max_age = max_age
+        self.excluded = excluded
+        # folder -> mtime_ns of last listing
+        self.folders = {}
+        # path -> mtime_ns
+        self.files = {}
+
+
+    def refresh(self, now=None):
+        folders = logwatcher.hourFolders(self.base_folder, now)
+
+        # forget folders of past hours
+        for folder in list(self.folders.keys()):
+            if folder not in folders:
+                del self.folders[folder]
+        for path in list(self.files.keys()):
+            if os.path.dirname(path) not in folders:
+                del self.files[path]
+
+        for folder in folders:
+            try:
+                mtime = os.stat(folder).st_mtime_ns
+            except FileNotFoundError:
+                continue
+            if self.folders.get(folder) == mtime:
+                continue
+            self.folders[folder] = mtime
+            with os.scandir(folder) as entries:
+                for entry in entries:
+                    if entry.name not in self.excluded and entry.is_file():
+                        self.files.setdefault(entry.path, 0)
+
+        for path in list(self.files.keys()):
+            try:
+                self.files[path] = os.stat(path).st_mtime_ns
+            except FileNotFoundError:
+                del self.files[path]
+
+
+    def newest(self):
+        """ Returns the most recently modified log file, ties broken by name
+        :return: string full path, None if no file was modified during the last max_age seconds
+        """
+        self.refresh()
+        oldest = (time.time() - self.max_age) * 1e9
+        candidates = [(mtime, path) for path, mtime in self.files.items() if mtime >= oldest]
+        if not candidates:
+            return None
+        return max(candidates)[1]
+
 
 class AdspLog:
 
@@ -9,42 +72,131 @@ class AdspLog:
         self.base_folder = folder
         today = datetime.today()
         self.folder = '{}/{}/{}/{}/{}'.format(folder, today.year, today.month, today.day, today.hour)
+        self.files = LogFiles(folder)
+        # filename -> [file handle, offset of the byte following the last line read, last line]
+        self.tails = {}
 
 
+    @timing.timed('log.find')
     def getLastLine(self):
-        cmd = 'find %s -type f -mmin -1' % self.folder
-        #proc = subprocess.Popen(cmd.split(), stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
-
-        stdout = []
-        with subprocess.Popen(cmd.split(), stdout=subprocess.PIPE, stderr=subprocess.DEVNULL) as proc:
-            read = proc.stdout.read()
-            if read:
-                files = read.decode('utf-8').splitlines()
-                stdout.extend(files)
-
-        # exclude debug.log
-        for f in stdout:
-            if 'debug.log' in f:
-                stdout.remove(f)
-
-        if proc.returncode > 0 or len(stdout) == 0:
-            raise Exception("Find process did not find a log file or a permission problem ocurred.")
-
-        lines = None
-        last_line = None
-        filename = stdout.pop()
-        with open(filename, 'r') as f:
-            lines = f.readlines()
-        if lines:
-            last_line = lines.pop()
+        filename = self.files.newest()
+        if filename is None:
+            raise Exception("No log file was modified during the last minute in {}.".format(self.base_folder))
+
+        return self.tail(filename)
+
+
+    def tail(self, filename, block_size=8192):
+        """ Returns the last complete line of a file.
+            File handles and offsets are kept between calls, so only bytes appended since the
+            previous call are read, backwards from the end of file.
+        :param filename: full path to log file
+        :param block_size: bytes read at once
+        :return: string last line, None if file is empty
+        """
+        state = self.tails.get(filename)
+        if state is not None:
+            handle = state[0]
+            # file rotated or truncated, start over
+            if os.stat(filename).st_ino != os.fstat(handle.fileno()).st_ino or os.fstat(handle.fileno()).st_size < state[1]:
+                handle.close()
+                state = None
+        if state is None:
+            state = [open(filename, 'rb'), 0, None]
+            self.tails[filename] = state
+
+        handle, offset, last_line = state
+        size = os.fstat(handle.fileno()).st_size
+
+        buf = b''
+        position = size
+        # end of the last complete line, relative to the end of file
+        end = None
+        while position > offset:
+            start = max(offset, position - block_size)
+            handle.seek(start)
+            buf = handle.read(position - start) + buf
+            position = start
+
+            if end is None:
+                index = buf.rfind(b'\n')
+                if index >= 0:
+                    end = len(buf) - index
+            if end is not None and buf.rfind(b'\n', 0, len(buf) - end) >= 0:
+                break
+
+        if end is not None:
+            index = len(buf) - end
+            begin = buf.rfind(b'\n', 0, index) + 1
+            last_line = buf[begin:index + 1].decode('utf-8', errors='replace')
+            state[1] = size - end + 1
+            state[2] = last_line
+        elif last_line is None and buf:
+            # no complete line yet, return what was written so far
+            return buf.decode('utf-8', errors='replace')
 
         return last_line
 
 
+    def close(self):
+        for handle, offset, last_line in self.tails.values():
+            handle.close()
+        self.tails = {}
+
+
+    @timing.timed('log.parse')
     def getDeviceIds(self, line):
         columns = line.split(',', 13)
-        data = json.loads(columns.pop(), encoding='utf-8')
+        data = json.loads(columns.pop())
         if 'deviceIds' in data.keys():
             return data['deviceIds']
         return None
 
+
+    def watch(self):
+        """ Starts watching new log lines, shared with other AdspLog of the same process
+        :return: int mark to pass to waitForDeviceIds()
+        """
+        return logwatcher.LogWatcher.get(self.base_folder).mark()
+
+
+    @timing.timed('log.find')
+    def waitForDeviceIds(self, expected, timeout, since=0, token=None):
+        """ Waits for the first line logged since mark which belongs to a test, see LogWatcher.waitForDeviceIds().
+            Lines of other tests are never returned, unless expected is empty and the log format does not carry the token
+        :param expected: iterable of device ids unique to the test, which the browser must send
+        :param timeout: seconds to wait at most
+        :param since: mark returned by watch()
+        :param token: string unique to the test, found in the line, e.g. in the referer column
+        :return: list of device ids of the matching line, None if no line matched
+        """
+        watcher = logwatcher.LogWatcher.get(self.base_folder)
+        found = watcher.waitForDeviceIds(expected, time.monotonic() + timeout, since, token)
+        if found:
+            return found[1]
+        return None
+
+
+    def logged(self, expected, since=0, token=None):
+        """ Tells, without waiting, whether a line of a test was logged since mark, see waitForDeviceIds()
+        :return: bool
+        """
+        watcher = logwatcher.LogWatcher.get(self.base_folder)
+        return watcher.waitForDeviceIds(expected, 0, since, token) is not None
+
+
+    @timing.timed('log.find')
+    def findByDeviceId(self, device_id, index_folder=None):
+        """ Log lines carrying a device id, answered from an on-disk index updated incrementally:
+            only log files of the hours written since the previous lookup are read
+        :param device_id: string device id
+        :param index_folder: folder of the index sidecar, see logindex.defaultFolder()
+        :return: list of (file, offset, timestamp)
+        """
+        index = logindex.LogIndex(self.base_folder, index_folder)
+        index.setup()
+        try:
+            index.update()
+            return index.find(device_id)
+        finally:
+            index.close()
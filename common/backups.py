@@ -0,0 +1,96 @@
+import os
+import json
+import hashlib
+from common import files
+
+
+class Backup:
+    """ Content addressed backup of a file, e.g. browser preferences.
+        Copies are stored once per content in a .backups folder next to the file, named by their sha256.
+        The first save() keeps the pristine content, later ones do nothing until restore() was called,
+        and restore() does nothing when the file still has the pristine content.
+        Hashes are remembered with the file stat, so an untouched file is never read again.
+    """
+
+    def __init__(self, filename, folder=None):
+        self.filename = filename
+        self.folder = folder or '{}/.backups'.format(os.path.dirname(os.path.abspath(filename)))
+        self.index_file = '{}/index.json'.format(self.folder)
+        self.name = os.path.basename(filename)
+
+
+    def fileStat(self):
+        stat = os.stat(self.filename)
+        return [stat.st_ino, stat.st_mtime_ns, stat.st_size]
+
+
+    def loadIndex(self):
+        try:
+            with open(self.index_file) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+
+
+    def saveIndex(self, index):
+        tmp_file = '{}.tmp'.format(self.index_file)
+        with open(tmp_file, 'w') as f:
+            json.dump(index, f)
+        os.replace(tmp_file, self.index_file)
+
+
+    def digest(self):
+        sha = hashlib.sha256()
+        with open(self.filename, 'rb') as f:
+            for chunk in iter(lambda: f.read(1 << 20), b''):
+                sha.update(chunk)
+        return sha.hexdigest()
+
+
+    def save(self):
+        """ Keeps the current content as the one to restore, unless a backup is already waiting for restore()
+        :return: string sha256 of the backup
+        """
+        index = self.loadIndex()
+        entry = index.get(self.name)
+        if entry and entry['pending'] and os.path.exists('{}/{}'.format(self.folder, entry['hash'])):
+            return entry['hash']
+
+        stat = self.fileStat()
+        if entry and entry['stat'] == stat:
+            digest = entry['hash']
+        else:
+            digest = self.digest()
+
+        blob = '{}/{}'.format(self.folder, digest)
+        if not os.path.exists(blob):
+            os.makedirs(self.folder, exist_ok=True)
+            files.reflink(self.filename, blob + '.tmp')
+            os.replace(blob + '.tmp', blob)
+
+        index[self.name] = {'hash': digest, 'stat': stat, 'pending': True}
+        self.saveIndex(index)
+        return digest
+
+
+    def restore(self):
+        """ Puts the saved content back, through a copy on write clone and a rename
+        :return: bool True when the file had to be replaced
+        """
+        index = self.loadIndex()
+        entry = index.get(self.name)
+        if not entry:
+            raise FileNotFoundError('Backup.restore(): no backup of {}'.format(self.filename))
+
+        restored = False
+        stat = self.fileStat() if os.path.exists(self.filename) else None
+        if stat != entry['stat'] and (stat is None or self.digest() != entry['hash']):
+            tmp_file = '{}.tmp'.format(self.filename)
+            files.reflink('{}/{}'.format(self.folder, entry['hash']), tmp_file)
+            os.replace(tmp_file, self.filename)
+            restored = True
+
+        entry['stat'] = self.fileStat()
+        entry['pending'] = False
+        self.saveIndex(index)
+        return restored
@@ -1,4 +1,79 @@
+import os
+import shutil
+import hashlib
 import sqlite3
+import time
+import threading
+import functools
+import urllib.parse
+from contextlib import contextmanager
+from common import timing
+
+
+# per thread connection cache: (path, readonly) -> (connection, inode of the file when opened)
+connections = threading.local()
+
+
+def connect(path, readonly=False):
+    """ Returns a cached connection of the current thread to a database file.
+        A file replaced since the connection was opened (profile clone, snapshot restore) gets a new one.
+    :param path: database file
+    :param readonly: open with a mode=ro uri
+    :return: sqlite3.Connection
+    """
+    cache = getattr(connections, 'cache', None)
+    if cache is None:
+        cache = connections.cache = {}
+
+    try:
+        inode = os.stat(path).st_ino
+    except FileNotFoundError:
+        inode = None
+
+    key = (path, readonly)
+    cached = cache.get(key)
+    if cached and cached[1] == inode:
+        return cached[0]
+    if cached:
+        cached[0].close()
+
+    connection = None
+    if readonly:
+        try:
+            connection = sqlite3.connect('file:{}?mode=ro'.format(urllib.parse.quote(path)), uri=True, cached_statements=256)
+        except sqlite3.OperationalError:
+            # e.g. wal database without its -shm file, fall back to a read-write connection
+            connection = None
+    if connection is None:
+        connection = sqlite3.connect(path, cached_statements=256)
+
+    cache[key] = (connection, inode)
+    return connection
+
+
+def disconnect(path):
+    """ Closes the cached connections of the current thread to a database file, read-write and readonly
+    :param path: database file
+    """
+    cache = getattr(connections, 'cache', {})
+    for key in ((path, False), (path, True)):
+        cached = cache.pop(key, None)
+        if cached:
+            cached[0].close()
+
+
+def closeConnections():
+    """ Closes every cached connection of the current thread
+    """
+    cache = getattr(connections, 'cache', {})
+    for connection, inode in cache.values():
+        connection.close()
+    cache.clear()
+
+
+@functools.lru_cache(maxsize=256)
+def formatStatement(template, table):
+    return template.format(table)
 
 
 class Database:
@@ -11,25 +86,243 @@ class Database:
         self.db_cursor = None
 
 
-    def setup(self):
-        self.db_connection = sqlite3.connect('%s/%s' % (self.folder, self.db_name))
+    def setup(self, readonly=False):
+        """ Borrows a cached connection, opened once per thread and database file
+        :param readonly: read through a mode=ro connection
+        """
+        self.db_connection = connect('%s/%s' % (self.folder, self.db_name), readonly)
         self.db_cursor = self.db_connection.cursor()
 
 
     def close(self):
+        """ Gives the connection back to the cache, uncommitted changes are dropped
+        """
         if self.db_connection:
+            if self.db_connection.in_transaction:
+                self.db_connection.rollback()
             self.db_cursor = None
-            self.db_connection.close()
             self.db_connection = None
 
 
+    @contextmanager
+    def session(self, readonly=False):
+        """ setup() / close() around a block, committing when the block succeeds
+        """
+        self.setup(readonly)
+        try:
+            yield self
+            self.db_connection.commit()
+        finally:
+            self.close()
+
+
+    def __enter__(self):
+        self.setup()
+        return self
+
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.db_connection.commit()
+        self.close()
+
+
+    def statement(self, template):
+        """ Query template with the table name filled in, the same string is returned every time
+            so sqlite reuses its prepared statement
+        :param template: query with {} standing for the table
+        """
+        return formatStatement(template, self.db_table)
+
+
+    def changeSignature(self):
+        """ Cheap fingerprint of database content, changes whenever another connection commits
+        :return: tuple
+        """
+        signature = []
+        try:
+            signature.append(self.db_cursor.execute('PRAGMA data_version;').fetchone()[0])
+        except sqlite3.OperationalError:
+            # database locked by the browser, file stats are enough
+            signature.append(None)
+
+        path = '%s/%s' % (self.folder, self.db_name)
+        for suffix in ('', '-wal', '-journal'):
+            try:
+                stat = os.stat(path + suffix)
+                signature.append((stat.st_mtime_ns, stat.st_size))
+            except FileNotFoundError:
+                signature.append(None)
+        return tuple(signature)
+
+
+    @timing.timed('wait_after')
+    def waitForCookie(self, name, domain, predicate=None, deadline=None, interval=0.01):
+        """ Polls the database until get(name, domain) satisfies predicate
+        :param name: cookie name
+        :param domain: cookie domain, as accepted by get()
+        :param predicate: function taking the cookie, by default any non empty cookie matches
+        :param deadline: time.monotonic() value after which waiting stops, by default no waiting
+        :param interval: seconds between two database change checks
+        :return: the matching cookie, or the last cookie read when deadline was reached
+        """
+        if predicate is None:
+            predicate = bool
+        if deadline is None:
+            deadline = time.monotonic()
+
+        opened = self.db_connection is None
+        if opened:
+            self.setup(readonly=True)
+
+        signature = None
+        cookie = None
+        try:
+            while True:
+                current = self.changeSignature()
+                # only read again when something was written
+                if current != signature:
+                    try:
+                        cookie = self.get(name, domain)
+                        signature = current
+                    except sqlite3.OperationalError:
+                        cookie = None
+                    if cookie is not None and predicate(cookie):
+                        return cookie
+
+                if time.monotonic() >= deadline:
+                    return cookie
+                time.sleep(interval)
+        finally:
+            if opened:
+                self.close()
+
+
+    @contextmanager
+    def fastLoad(self):
+        """ Relaxes durability (in memory journal, no fsync) while bulk loading, restores it afterwards.
+            Only for databases the browser does not hold: raises RuntimeError when it can't get
+            an exclusive lock, which is the case while the browser is running.
+        """
+        self.db_connection.commit()
+        try:
+            self.db_cursor.execute('BEGIN EXCLUSIVE;')
+            self.db_connection.commit()
+        except sqlite3.OperationalError:
+            raise RuntimeError('Database.fastLoad(): {} is locked, is the browser running?'.format(self.db_name))
+
+        journal_mode = self.db_cursor.execute('PRAGMA journal_mode;').fetchone()[0]
+        synchronous = self.db_cursor.execute('PRAGMA synchronous;').fetchone()[0]
+        self.db_cursor.execute('PRAGMA journal_mode=MEMORY;')
+        self.db_cursor.execute('PRAGMA synchronous=OFF;')
+        try:
+            yield self
+        finally:
+            self.db_connection.commit()
+            self.db_cursor.execute('PRAGMA journal_mode={};'.format(journal_mode))
+            self.db_cursor.execute('PRAGMA synchronous={};'.format(synchronous))
+
+
+    @timing.timed('cookies.flush')
     def flush(self):
-        query = 'DELETE FROM {};'.format(self.db_table)
+        query = self.statement('DELETE FROM {};')
         self.db_cursor.execute(query);
         self.db_connection.commit()
 
 
+    def snapshotPath(self):
+        return '%s/%s.snapshot' % (self.folder, self.db_name)
+
+
+    def schemaSignature(self):
+        """ Fingerprint of the database schema: user_version and sqlite_master, both change when
+            a browser upgrade migrates the database
+        :return: string sha256
+        """
+        opened = self.db_connection is None
+        if opened:
+            self.setup(readonly=True)
+        try:
+            sha = hashlib.sha256()
+            sha.update(repr(self.db_cursor.execute('PRAGMA user_version;').fetchone()).encode('utf-8'))
+            for row in self.db_cursor.execute('SELECT type, name, tbl_name, sql FROM sqlite_master ORDER BY type, name;'):
+                sha.update(repr(row).encode('utf-8'))
+            return sha.hexdigest()
+        finally:
+            if opened:
+                self.close()
+
+
+    def snapshotSignature(self):
+        """ Schema signature of the database when the snapshot was taken
+        :return: string, None without snapshot
+        """
+        try:
+            with open(self.snapshotPath() + '.schema') as f:
+                return f.read().strip()
+        except FileNotFoundError:
+            return None
+
+
+    @timing.timed('cookies.snapshot')
+    def snapshot(self):
+        """ Captures a clean copy of the database next to it, same schema and an empty table,
+            taken with the sqlite backup API so it is consistent even while the file is in use.
+            The schema signature is kept next to it, see restore()
+        """
+        path = self.snapshotPath()
+        opened = self.db_connection is None
+        if opened:
+            self.setup(readonly=True)
+
+        copy = sqlite3.connect(path + '.tmp')
+        try:
+            signature = self.schemaSignature()
+            self.db_connection.backup(copy)
+            copy.execute(self.statement('DELETE FROM {};'))
+            copy.commit()
+            copy.execute('VACUUM;')
+        finally:
+            copy.close()
+            if opened:
+                self.close()
+        os.replace(path + '.tmp', path)
+
+        with open(path + '.schema.tmp', 'w') as f:
+            f.write(signature)
+        os.replace(path + '.schema.tmp', path + '.schema')
+
+
+    @timing.timed('cookies.restore')
+    def restore(self):
+        """ Puts the clean snapshot back in place of the database, taking it on first call, and again
+            when the schema changed since, e.g. migrated by a browser upgrade.
+            Costs one file copy and a rename whatever the size of the history, unlike flush().
+            The browser must not be running.
+        """
+        path = '%s/%s' % (self.folder, self.db_name)
+        snapshot = self.snapshotPath()
+        if not os.path.exists(snapshot) or self.snapshotSignature() != self.schemaSignature():
+            self.snapshot()
+
+        opened = self.db_connection is not None
+        self.close()
+        # cached connections must not keep the replaced file and its journals open
+        disconnect(path)
+
+        shutil.copyfile(snapshot, path + '.tmp')
+        # journals left by the browser would be replayed against the restored file
+        for suffix in ('-wal', '-shm', '-journal'):
+            try:
+                os.remove(path + suffix)
+            except FileNotFoundError:
+                pass
+        os.replace(path + '.tmp', path)
+
+        if opened:
+            self.setup()
+
+
     def __del__(self):
-        if self.db_connection:
-            self.db_connection.close()
+        self.close()
 
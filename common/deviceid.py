@@ -0,0 +1,82 @@
+""" adsp cookie value codec: `ls=<last seen ms>|v=<version>|di=<device id>[|di=...]`, as written by
+    the first party script, or url encoded (`ls%3D...%7Cv%3D1%7Cdi%3D...`) as set by the adsp server.
+    A device id is `<timestamp>.<uuid>`, e.g. 1447859209.11111111-1111-1111-bbbb-111111111111.
+"""
+
+import re
+import uuid
+import collections
+
+
+DEVICE_ID = r'([0-9]+)\.([0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12})'
+# one pass over the value: every well formed field with its separator, plain or url encoded,
+# as (name, device timestamp, device uuid, number)
+FIELD = re.compile(r'(ls|v|di)(?:=|%3D)(?:' + DEVICE_ID + r'|([0-9]+))(?![^|%])')
+
+
+class DeviceId(collections.namedtuple('DeviceId', ['timestamp', 'uuid'])):
+    """ Device id: timestamp int, uuid 16 bytes. str() gives back its cookie form.
+    """
+    __slots__ = ()
+
+    def __str__(self):
+        return '{}.{}'.format(self.timestamp, uuid.UUID(bytes=self.uuid))
+
+
+CookieValue = collections.namedtuple('CookieValue', ['last_seen', 'version', 'devices'])
+
+
+def device(timestamp, hex_uuid):
+    # hex_uuid is already validated by the regex, no need for uuid.UUID()
+    return DeviceId(int(timestamp), bytes.fromhex(hex_uuid.replace('-', '')))
+
+
+def decode(value):
+    """ Parses a whole cookie value
+    :param value: string cookie value, plain or url encoded
+    :return: CookieValue(last_seen int or None, version int or None, devices tuple of DeviceId), malformed device ids are left out
+    """
+    last_seen = version = None
+    devices = []
+    for field, timestamp, hex_uuid, number in FIELD.findall(value):
+        if hex_uuid:
+            if field == 'di':
+                devices.append(device(timestamp, hex_uuid))
+        elif field == 'ls':
+            last_seen = int(number)
+        elif field == 'v':
+            version = int(number)
+    return CookieValue(last_seen, version, tuple(devices))
+
+
+def encode(cookie_value, url_encoded=False):
+    """ Formats a CookieValue back to a cookie value
+    """
+    fields = []
+    if cookie_value.last_seen is not None:
+        fields.append('ls={}'.format(cookie_value.last_seen))
+    if cookie_value.version is not None:
+        fields.append('v={}'.format(cookie_value.version))
+    fields.extend('di={}'.format(device_id) for device_id in cookie_value.devices)
+    value = '|'.join(fields)
+    if url_encoded:
+        value = value.replace('=', '%3D').replace('|', '%7C')
+    return value
+
+
+def deviceIds(value):
+    """ Device ids of a cookie value, in order, as strings
+    :param value: string cookie value, plain or url encoded
+    :return: list of strings
+    """
+    # same fields as decode(), without building DeviceId records only to format them back
+    return ['{}.{}'.format(timestamp, hex_uuid) for field, timestamp, hex_uuid, number in FIELD.findall(value) if hex_uuid and field == 'di']
+
+
+def extractMany(values):
+    """ Device ids of many cookie values, e.g. for an audit of a whole cookie database
+    :param values: list of string cookie values
+    :return: list, for every value, of the list of its DeviceId
+    """
+    findall = FIELD.findall
+    return [[device(timestamp, hex_uuid) for field, timestamp, hex_uuid, number in findall(value) if hex_uuid and field == 'di'] for value in values]
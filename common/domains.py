@@ -0,0 +1,87 @@
+import os
+import functools
+import ipaddress
+import urllib.parse
+
+
+SUFFIX_FILE = '{}/public_suffix.dat'.format(os.path.dirname(os.path.abspath(__file__)))
+
+# trie node keys, labels never contain them
+RULE = ''
+EXCEPTION = '!'
+WILDCARD = '*'
+
+
+@functools.lru_cache(maxsize=None)
+def suffixes(filename=SUFFIX_FILE):
+    """ Public suffix rules as a trie of nested dicts keyed by labels, right to left,
+        read once on first use
+    :param filename: rules in public suffix list format
+    :return: dict
+    """
+    trie = {}
+    with open(filename, encoding='utf-8') as f:
+        for line in f:
+            rule = line.split()[0] if line.strip() else ''
+            if not rule or rule.startswith('//'):
+                continue
+            exception = rule.startswith('!')
+            node = trie
+            for label in reversed(rule.lstrip('!').split('.')):
+                node = node.setdefault(label, {})
+            node[EXCEPTION if exception else RULE] = True
+    return trie
+
+
+@functools.lru_cache(maxsize=4096)
+def hostname(domain):
+    """ Host name of a domain, cookie domain or url: lowercase, without leading dot, port or path
+    :param domain: string e.g. '.adsp.localhost', 'http://www.example.co.uk:8080/page'
+    :return: string
+    """
+    if '://' not in domain:
+        domain = 'http://{}'.format(domain.lstrip('.'))
+    return (urllib.parse.urlparse(domain).hostname or '').strip('.')
+
+
+def suffixLength(labels):
+    """ Number of labels of the public suffix of a host
+    :param labels: host labels, right to left
+    :return: int
+    """
+    node = suffixes()
+    # default rule '*': an unknown top level label is a suffix
+    length = 1
+    for position, label in enumerate(labels):
+        child = node.get(label)
+        wildcard = node.get(WILDCARD)
+        if child is not None and EXCEPTION in child:
+            return position
+        if (child is not None and RULE in child) or (wildcard is not None and RULE in wildcard):
+            length = position + 1
+        if child is None:
+            break
+        node = child
+    return length
+
+
+@functools.lru_cache(maxsize=4096)
+def registrable(domain):
+    """ Registrable domain (eTLD+1) of a domain, cookie domain or url,
+        e.g. 'http://www.adsp.localhost/x' -> 'adsp.localhost', 'a.b.example.co.uk' -> 'example.co.uk'
+        Ip addresses and public suffixes themselves are returned as is.
+    :param domain: string
+    :return: string
+    """
+    host = hostname(domain)
+    try:
+        ipaddress.ip_address(host)
+        return host
+    except ValueError:
+        pass
+
+    labels = host.split('.')[::-1]
+    length = suffixLength(labels)
+    if len(labels) <= length:
+        return host
+    return '.'.join(reversed(labels[:length + 1]))
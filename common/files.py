@@ -0,0 +1,27 @@
+import os
+import shutil
+import fcntl
+
+
+# linux ioctl to share extents between two files (btrfs, xfs, ...)
+FICLONE = 0x40049409
+
+
+def reflink(src, dst, *, follow_symlinks=True):
+    """ Copies a file as a copy-on-write clone when the filesystem supports it, plain copy otherwise.
+        Hardlinks are not an option: browsers update their sqlite databases in place, so the
+        template would be modified too.
+    :param src: source file
+    :param dst: destination file
+    """
+    if os.path.islink(src) and not follow_symlinks:
+        os.symlink(os.readlink(src), dst)
+        return dst
+
+    try:
+        with open(src, 'rb') as fsrc, open(dst, 'wb') as fdst:
+            fcntl.ioctl(fdst.fileno(), FICLONE, fsrc.fileno())
+        shutil.copystat(src, dst)
+    except OSError:
+        shutil.copy2(src, dst)
+    return dst
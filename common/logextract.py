@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+""" Streaming device id extraction over adsp log archives.
+
+    Usage, from repository root:
+
+        python3 -m common.logextract FOLDER [--device-id ID] [--malformed] [--since 2015-11-18T10] [--until 2015-11-19] [--workers N]
+
+    Prints one json record per matching line: timestamp, file, offset, deviceIds.
+"""
+
+import argparse
+import json
+import os
+import sys
+from collections import deque, namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+
+Record = namedtuple('Record', ['timestamp', 'file', 'offset', 'deviceIds'])
+
+MARKER = b'deviceIds'
+
+# a line is 13 comma separated columns followed by a json payload
+COLUMNS = 13
+
+
+def numericEntries(folder):
+    """ Sub folders of folder named by a number, sorted by value
+    :return: list of (int, path)
+    """
+    try:
+        with os.scandir(folder) as entries:
+            numbers = [(int(entry.name), entry.path) for entry in entries if entry.name.isdigit() and entry.is_dir()]
+    except FileNotFoundError:
+        return []
+    return sorted(numbers)
+
+
+def walk(base_folder, since=None, until=None):
+    """ Lazily yields log files of the year/month/day/hour tree, oldest hour first
+    :param base_folder: adsp logs base folder
+    :param since: datetime, hours before it are skipped
+    :param until: datetime, hours after it are skipped, its own hour is included
+    """
+    low = since.replace(minute=0, second=0, microsecond=0) if since else None
+    for year, year_folder in numericEntries(base_folder):
+        for month, month_folder in numericEntries(year_folder):
+            for day, day_folder in numericEntries(month_folder):
+                for hour, hour_folder in numericEntries(day_folder):
+                    moment = datetime(year, month, day, hour)
+                    if low and moment < low:
+                        continue
+                    if until and moment > until:
+                        return
+                    with os.scandir(hour_folder) as entries:
+                        files = sorted(entry.path for entry in entries if entry.is_file() and entry.name != 'debug.log')
+                    yield from files
+
+
+def parseLine(line):
+    """ Parses a raw log line
+    :param line: bytes
+    :return: (timestamp, device ids), device ids is None when the deviceIds payload is malformed
+    """
+    columns = line.split(b',', COLUMNS)
+    timestamp = columns[0].decode('utf-8', errors='replace')
+    try:
+        data = json.loads(columns[COLUMNS])
+        devices = data['deviceIds']
+    except (IndexError, ValueError, KeyError, TypeError):
+        return timestamp, None
+    if not isinstance(devices, list) or not all(isinstance(device, str) for device in devices):
+        return timestamp, None
+    return timestamp, devices
+
+
+def extractFile(filename, device_id=None, malformed=False, start=0):
+    """ Extracts records from one log file
+    :param filename: full path to log file
+    :param device_id: only keep lines carrying this device id
+    :param malformed: only keep lines with a malformed deviceIds payload, combined with device_id as an or
+    :param start: byte offset to start reading from
+    :return: list of Record
+    """
+    needle = device_id.encode('utf-8') if device_id else None
+    records = []
+    offset = start
+    with open(filename, 'rb') as f:
+        f.seek(start)
+        for line in f:
+            position = offset
+            offset += len(line)
+            # cheap byte level filters before json decoding
+            if MARKER not in line:
+                continue
+            if needle and not malformed and needle not in line:
+                continue
+
+            timestamp, devices = parseLine(line)
+            if devices is None:
+                if malformed or not needle:
+                    records.append(Record(timestamp, filename, position, None))
+                continue
+            if malformed and not needle:
+                continue
+            if needle and device_id not in devices:
+                continue
+            records.append(Record(timestamp, filename, position, devices))
+    return records
+
+
+def extract(base_folder, device_id=None, malformed=False, since=None, until=None, workers=None):
+    """ Streams records over a whole log archive, files are fanned out across a process pool.
+        Records come out in file order.
+    :param base_folder: adsp logs base folder
+    :param device_id: only keep lines carrying this device id
+    :param malformed: only keep lines with a malformed deviceIds payload
+    :param since: datetime lower bound
+    :param until: datetime upper bound
+    :param workers: number of processes, cpu count by default
+    """
+    workers = workers or os.cpu_count() or 1
+    files = walk(base_folder, since, until)
+
+    if workers == 1:
+        for filename in files:
+            yield from extractFile(filename, device_id, malformed)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = deque()
+        for filename in files:
+            pending.append(executor.submit(extractFile, filename, device_id, malformed))
+            # keep a bounded number of files in flight
+            if len(pending) >= workers * 2:
+                yield from pending.popleft().result()
+        while pending:
+            yield from pending.popleft().result()
+
+
+def parseDate(value, end=False):
+    """ Parses a --since / --until bound
+    :param end: bound is an upper one, a bare date then stands for the last hour of that day
+    :return: datetime
+    """
+    for pattern in ('%Y-%m-%dT%H', '%Y-%m-%d'):
+        try:
+            moment = datetime.strptime(value, pattern)
+        except ValueError:
+            continue
+        if end and pattern == '%Y-%m-%d':
+            moment = moment.replace(hour=23)
+        return moment
+    raise argparse.ArgumentTypeError('expected YYYY-MM-DD or YYYY-MM-DDTHH, got {}'.format(value))
+
+
+def parseEndDate(value):
+    return parseDate(value, end=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python3 -m common.logextract', description='Extract device ids from adsp logs.')
+    parser.add_argument('folder', help='adsp logs base folder')
+    parser.add_argument('--device-id', help='only lines carrying this device id')
+    parser.add_argument('--malformed', action='store_true', help='only lines with a malformed deviceIds payload')
+    parser.add_argument('--since', type=parseDate, help='YYYY-MM-DD or YYYY-MM-DDTHH, included')
+    parser.add_argument('--until', type=parseEndDate, help='YYYY-MM-DD or YYYY-MM-DDTHH, included: a bare date includes the whole day')
+    parser.add_argument('--workers', type=int, default=None, help='number of processes, cpu count by default')
+    args = parser.parse_args(argv)
+
+    for record in extract(args.folder, args.device_id, args.malformed, args.since, args.until, args.workers):
+        print(json.dumps(record._asdict()))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
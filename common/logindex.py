@@ -0,0 +1,106 @@
+import os
+import hashlib
+import tempfile
+from datetime import datetime, timedelta
+from common import database
+from common import logextract
+
+
+def defaultFolder(base_folder):
+    """ Index folder of a logs base folder, under the temporary folder: the logs folder belongs to adsp
+    :param base_folder: adsp logs base folder
+    :return: string full path
+    """
+    digest = hashlib.sha1(os.path.abspath(base_folder).encode('utf-8')).hexdigest()[:16]
+    return os.path.join(tempfile.gettempdir(), 'deviceid-logindex-{}'.format(digest))
+
+
+class LogIndex(database.Database):
+    """ SQLite sidecar mapping device ids to the adsp log lines carrying them.
+        Fed incrementally: every file is read from the offset reached by the previous update,
+        and only the hourly folders written since the previous update are looked at.
+    """
+
+    def __init__(self, base_folder, folder=None, db_name='.deviceids.sqlite', db_table='device_ids'):
+        folder = folder or defaultFolder(base_folder)
+        os.makedirs(folder, exist_ok=True)
+        super().__init__(folder, db_name, db_table)
+        self.base_folder = base_folder
+
+
+    def setup(self, readonly=False):
+        super().setup(readonly)
+        self.db_cursor.executescript("""
+            CREATE TABLE IF NOT EXISTS files (path TEXT PRIMARY KEY, inode INTEGER, offset INTEGER);
+            CREATE TABLE IF NOT EXISTS marks (name TEXT PRIMARY KEY, value TEXT);
+            CREATE TABLE IF NOT EXISTS {0} (device_id TEXT, file TEXT, offset INTEGER, timestamp TEXT);
+            CREATE INDEX IF NOT EXISTS {0}_device_id ON {0} (device_id);
+            CREATE INDEX IF NOT EXISTS {0}_file ON {0} (file);
+            """.format(self.db_table))
+
+
+    def mark(self):
+        """ Oldest hour which may have received lines since the previous update: the hour of the
+            previous update, and the one before around rollover
+        :return: datetime, None when the index was never updated
+        """
+        row = self.db_cursor.execute("SELECT value FROM marks WHERE name='updated';").fetchone()
+        if not row:
+            return None
+        return datetime.fromisoformat(row[0]) - timedelta(hours=1)
+
+
+    def update(self, since=None):
+        """ Indexes lines appended to log files since last update
+        :param since: datetime, older hourly folders are not looked at, mark() by default
+        :return: int number of device ids indexed
+        """
+        started = datetime.today()
+        if since is None:
+            since = self.mark()
+        indexed = 0
+
+        for filename in logextract.walk(self.base_folder, since):
+            stat = os.stat(filename)
+            known = self.db_cursor.execute('SELECT inode, offset FROM files WHERE path=?;', (filename,)).fetchone()
+            inode, offset = known or (stat.st_ino, 0)
+            if inode != stat.st_ino or stat.st_size < offset:
+                # rotated or truncated, index it again
+                self.db_cursor.execute(self.statement('DELETE FROM {} WHERE file=?;'), (filename,))
+                inode, offset = stat.st_ino, 0
+            if stat.st_size == offset:
+                continue
+
+            rows = []
+            with open(filename, 'rb') as f:
+                f.seek(offset)
+                for line in f:
+                    # a line still being written is indexed next time
+                    if not line.endswith(b'\n'):
+                        break
+                    position = offset
+                    offset += len(line)
+                    if logextract.MARKER not in line:
+                        continue
+                    timestamp, devices = logextract.parseLine(line)
+                    for device_id in devices or []:
+                        rows.append((device_id, filename, position, timestamp))
+
+            query = self.statement('INSERT INTO {}(device_id, file, offset, timestamp) VALUES (?, ?, ?, ?);')
+            self.db_cursor.executemany(query, rows)
+            self.db_cursor.execute('INSERT OR REPLACE INTO files(path, inode, offset) VALUES (?, ?, ?);', (filename, inode, offset))
+            self.db_connection.commit()
+            indexed += len(rows)
+
+        self.db_cursor.execute("INSERT OR REPLACE INTO marks(name, value) VALUES ('updated', ?);", (started.isoformat(),))
+        self.db_connection.commit()
+        return indexed
+
+
+    def find(self, device_id):
+        """ Log lines carrying a device id
+        :param device_id: string device id
+        :return: list of (file, offset, timestamp)
+        """
+        query = self.statement('SELECT file, offset, timestamp FROM {} WHERE device_id=? ORDER BY rowid;')
+        return self.db_cursor.execute(query, (device_id,)).fetchall()
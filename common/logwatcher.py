@@ -0,0 +1,241 @@
+import os
+import sys
+import json
+import time
+import errno
+import select
+import ctypes
+import ctypes.util
+import threading
+from collections import deque
+from datetime import datetime, timedelta
+from common import timing
+
+
+# inotify(7) flags
+IN_MODIFY = 0x00000002
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_NONBLOCK = 0o4000
+
+
+class Inotify:
+    """ Minimal inotify binding through libc, raises OSError where inotify is not available
+    """
+
+    def __init__(self):
+        if not sys.platform.startswith('linux'):
+            raise OSError(errno.ENOSYS, 'inotify is only available on linux')
+        self.libc = ctypes.CDLL(ctypes.util.find_library('c'), use_errno=True)
+        self.fd = self.libc.inotify_init1(IN_NONBLOCK)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), 'inotify_init1 failed')
+        self.watches = {}
+
+
+    def add(self, path, mask=IN_MODIFY | IN_CREATE | IN_MOVED_TO):
+        if path in self.watches:
+            return
+        wd = self.libc.inotify_add_watch(self.fd, os.fsencode(path), mask)
+        if wd < 0:
+            raise OSError(ctypes.get_errno(), 'inotify_add_watch failed on {}'.format(path))
+        self.watches[path] = wd
+
+
+    def read(self, timeout):
+        """ Waits for events and drains them
+        :param timeout: seconds
+        :return: True if a watched folder changed
+        """
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return False
+
+        try:
+            while os.read(self.fd, 65536):
+                pass
+        except BlockingIOError:
+            pass
+        return True
+
+
+    def close(self):
+        os.close(self.fd)
+
+
+def hourFolders(base_folder, now=None):
+    """ Log folders that may receive lines now: current hour, and previous hour around rollover
+    :param base_folder: adsp logs base folder
+    :return: list of folders
+    """
+    now = now or datetime.today()
+    folders = []
+    for moment in (now - timedelta(minutes=1), now):
+        folder = '{}/{}/{}/{}/{}'.format(base_folder, moment.year, moment.month, moment.day, moment.hour)
+        if folder not in folders:
+            folders.append(folder)
+    return folders
+
+
+def parseDeviceIds(line):
+    """ Extracts deviceIds from a log line, None when the line has none or is malformed
+    """
+    try:
+        data = json.loads(line.split(',', 13)[13])
+    except (IndexError, ValueError):
+        return None
+    if isinstance(data, dict):
+        return data.get('deviceIds')
+    return None
+
+
+class LogWatcher(threading.Thread):
+    """ Streams lines appended to adsp logs and hands them to waiting tests.
+        Uses inotify on the hourly folders, falls back to polling file sizes.
+    """
+
+    # base folder -> LogWatcher, so concurrent tests of a process share one watcher
+    shared = {}
+    shared_lock = threading.Lock()
+
+    def __init__(self, base_folder, interval=0.05, history=10000):
+        super().__init__(daemon=True)
+        self.base_folder = base_folder
+        self.interval = interval
+        # (sequence number, filename, line, device ids)
+        self.lines = deque(maxlen=history)
+        self.sequence = 0
+        self.condition = threading.Condition()
+        self.offsets = {}
+        self.stopped = threading.Event()
+        try:
+            self.inotify = Inotify()
+        except OSError:
+            self.inotify = None
+
+
+    @classmethod
+    def get(cls, base_folder):
+        """ Returns the running watcher for base_folder, starts it if needed
+        """
+        with cls.shared_lock:
+            watcher = cls.shared.get(base_folder)
+            if watcher is None or not watcher.is_alive():
+                watcher = cls(base_folder)
+                watcher.scan(initial=True)
+                watcher.start()
+                cls.shared[base_folder] = watcher
+            return watcher
+
+
+    def scan(self, initial=False):
+        """ Reads new lines from every log file of the hourly folders
+        :param initial: only record current file sizes, existing lines are not streamed
+        """
+        for folder in hourFolders(self.base_folder):
+            if self.inotify:
+                # watch the nearest existing parent until the hourly folder gets created
+                watched = folder
+                while not os.path.isdir(watched) and len(watched) > len(self.base_folder):
+                    watched = os.path.dirname(watched)
+                try:
+                    self.inotify.add(watched)
+                except OSError:
+                    pass
+            try:
+                entries = list(os.scandir(folder))
+            except FileNotFoundError:
+                continue
+            for entry in entries:
+                if not entry.is_file() or entry.name == 'debug.log':
+                    continue
+                if initial:
+                    self.offsets[entry.path] = entry.stat().st_size
+                else:
+                    self.follow(entry.path, entry.stat().st_size)
+
+
+    def follow(self, filename, size):
+        """ Streams complete lines appended to filename since last read
+        """
+        offset = self.offsets.get(filename, 0)
+        if size < offset:
+            # truncated
+            offset = 0
+        if size == offset:
+            return
+
+        with open(filename, 'rb') as f:
+            f.seek(offset)
+            data = f.read(size - offset)
+        end = data.rfind(b'\n')
+        if end < 0:
+            return
+        self.offsets[filename] = offset + end + 1
+
+        # parsed out of the lock, tests keep reading lines meanwhile.
+        # Runs in the watcher thread, its time counts for the test being timed
+        with timing.span('log.parse'):
+            lines = [raw.decode('utf-8', errors='replace') for raw in data[:end].split(b'\n')]
+            parsed = [(line, parseDeviceIds(line)) for line in lines]
+
+        with self.condition:
+            for line, devices in parsed:
+                self.sequence += 1
+                self.lines.append((self.sequence, filename, line, devices))
+            self.condition.notify_all()
+
+
+    def run(self):
+        while not self.stopped.is_set():
+            if self.inotify:
+                # a timeout makes sure new hour folders get watched
+                self.inotify.read(1.0)
+            else:
+                time.sleep(self.interval)
+            self.scan()
+
+
+    def stop(self):
+        self.stopped.set()
+        self.join()
+        if self.inotify:
+            self.inotify.close()
+
+
+    def mark(self):
+        """ Position in the line stream, lines written later are found by waitForDeviceIds(since=mark)
+        """
+        with self.condition:
+            return self.sequence
+
+
+    def waitForDeviceIds(self, expected, deadline, since=0, token=None):
+        """ Waits for the first line logged after since which belongs to a test: its deviceIds contain one of
+            expected, or the line contains the test token. A test logs one line with deviceIds, so the first
+            match is the one of the test.
+            With no expected device id, the test is only recognized by its token, which a log format may not
+            carry: the last line with deviceIds logged after since is then returned at deadline, as the last
+            line of the logs used to be. It belongs to the test only when no other test runs at the same time
+        :param expected: iterable of device ids unique to the test
+        :param deadline: time.monotonic() value after which waiting stops
+        :param since: value returned by mark()
+        :param token: string unique to the test, e.g. found in the referer column
+        :return: (line, device ids) matching, None if no line matched before deadline
+        """
+        expected = set(expected)
+        last = None
+        with self.condition:
+            while True:
+                for sequence, filename, line, devices in self.lines:
+                    if sequence <= since or not devices:
+                        continue
+                    if expected.intersection(devices) or (token and token in line):
+                        return line, devices
+                    since = sequence
+                    last = (line, devices)
+
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return None if expected else last
+                self.condition.wait(remaining)
@@ -0,0 +1,562 @@
+""" Device id test matrix: cookie policies, cookie scenarios, and what every
+    (browser, flow, policy, scenario) case expects. common/scenarios.py turns it into TestCases.
+"""
+
+
+# cookie policies, 'blacklist' lists the parties (keys of settings.<flow>['domains']) whose domain is blocked
+POLICIES = {
+    'all_cookies': {
+        'cookie_behavior': 'all',
+        'blacklist': [],
+    },
+    'nothing': {
+        'cookie_behavior': 'nothing',
+        'blacklist': [],
+    },
+    'only_first_party_cookies': {
+        'cookie_behavior': 'only_1',
+        'blacklist': [],
+    },
+    'only_third_party_cookies': {
+        # Chromium doesn't save cookies of a blacklisted domain, Firefox does
+        'cookie_behavior': 'all',
+        'blacklist': ['first'],
+    },
+}
+
+
+# cookies seeded before browsing, keyed by party, '{A}' / '{B}' stand for the scenario devices.
+# 'querystring' is the device id of the click url, in click-to-advertiser flow.
+SCENARIOS = {
+    'allIsEmpty': {
+        'querystring': '1447344866.44444444-4444-4444-aaaa-444444444444',
+        'devices': {},
+        'cookies': {},
+    },
+    'cookieThirdIsEmpty': {
+        'querystring': '1447344866.44444444-4444-4444-bbbb-444444444444',
+        'devices': {'A': '1447859209.11111111-1111-1111-bbbb-111111111111'},
+        'cookies': {'first': 'ls=1447859209770|v=1|di={A}'},
+    },
+    'cookieFirstIsEmpty': {
+        'querystring': '1447344866.44444444-4444-4444-cccc-444444444444',
+        'devices': {'A': '1447859209.33333333-3333-3333-cccc-333333333333'},
+        'cookies': {'third': 'ls%3D1447859209000%7Cv%3D1%7Cdi%3D{A}'},
+    },
+    'cookiesContainSameDevice': {
+        'querystring': '1447344866.44444444-4444-4444-dddd-444444444444',
+        'devices': {'A': '1447859209.11111111-3333-1111-dddd-111111111111'},
+        'cookies': {'first': 'ls=1447859209000|v=1|di={A}', 'third': 'ls%3D1447859209000%7Cv%3D1%7Cdi%3D{A}'},
+    },
+    'cookiesContainDifferentDevices': {
+        'querystring': '1447344866.44444444-4444-4444-eeee-444444444444',
+        'devices': {'A': '1447859209.11111111-1111-1111-eeee-111111111111', 'B': '1447859209.33333333-3333-3333-eeee-333333333333'},
+        'cookies': {'first': 'ls=1447859209000|v=1|di={A}', 'third': 'ls%3D1447859209000%7Cv%3D1%7Cdi%3D{B}'},
+    },
+}
+
+
+# (browser, flow, policy, scenario) -> checks run once the page was browsed, browser None matches any browser.
+# A check is (assertion, operand, [operand,] message), assertions: empty, notEmpty, equal, notEqual, in, notIn.
+# Operands: 'first', 'third', 'logs' device ids found in cookies and adsp logs,
+# 'A', 'B' scenario devices, 'querystring' device id of the click url.
+EXPECTATIONS = {
+    (None, 'publisher', 'all_cookies', 'allIsEmpty'): {
+        'checks': [
+            ('notEmpty', 'first', 'First party cookies are empty, but they should contain a device id.'),
+            ('notEmpty', 'third', 'Third party cookies are empty, but they should contain a device id.'),
+            ('equal', 'first', 'third', 'Device ids found are different.'),
+            ('equal', 'first', 'logs', 'Device ids in adsp logs are different than device ids in cookies.'),
+        ],
+    },
+    (None, 'publisher', 'all_cookies', 'cookieThirdIsEmpty'): {
+        'checks': [
+            ('notEmpty', 'first', 'First party cookies are empty, but they should contain a device id.'),
+            ('notEmpty', 'third', 'Third party cookies are empty, but they should contain a device id.'),
+            ('in', 'A', 'first', 'Original device id was not found in first party cookies, seems that it was overriden by a new one.'),
+            ('equal', 'first', 'third', 'Device ids found are different.'),
+            ('in', 'A', 'logs', 'Original device ids was not found in adsp logs.'),
+        ],
+    },
+    (None, 'publisher', 'all_cookies', 'cookieFirstIsEmpty'): {
+        'checks': [
+            ('notEmpty', 'first', 'First party cookies are empty, but they should contain a device id.'),
+            ('notEmpty', 'third', 'Third party cookies are empty, but they should contain a device id.'),
+            ('in', 'A', 'third', 'Original device id was not found in third party cookies, seems that it was overriden by a new one.'),
+            ('in', 'A', 'first', 'Original device id A from third party cookies was not found in first party cookies, but it should be there.'),
+            ('in', 'A', 'logs', 'Original device ids was not found in adsp logs.'),
+        ],
+    },
+    (None, 'publisher', 'all_cookies', 'cookiesContainSameDevice'): {
+        'checks': [
+            ('notEmpty', 'first', 'First party cookies are empty, but they should contain a device id.'),
+            ('notEmpty', 'third', 'Third party cookies are empty, but they should contain a device id.'),
+            ('in', 'A', 'first', 'Original device id was not found in first party cookies, seems that it was overriden by a new one.'),
+            ('in', 'A', 'third', 'Original device id was not found in third party cookies, seems that it was overriden by a new one.'),
+            ('equal', 'first', 'third', 'Device ids found are different.'),
+            ('in', 'A', 'logs', 'Original device ids was not found in adsp logs.'),
+        ],
+    },
+    (None, 'publisher', 'all_cookies', 'cookiesContainDifferentDevices'): {
+        'checks': [
+            ('notEmpty', 'first', 'First party cookies are empty, but they should contain a device id.'),
+            ('notEmpty', 'third', 'Third party cookies are empty, but they should contain a device id.'),
+            ('in', 'A', 'first', 'Original device id was not found in first party cookies, seems that it was overriden by a new one.'),
+            ('in', 'B', 'third', 'Original device id was not found in third party cookies, seems that it was overriden by a new one.'),
+            ('in', 'B', 'first', 'Original device id from third party cookies was not found in first party cookies, but it should be in.'),
+            ('in', 'A', 'logs', 'Original device id from cookie first was not found in adsp logs.'),
+            ('in', 'B', 'logs', 'Original device id from cookie third was not found in adsp logs.'),
+        ],
+    },
+    (None, 'publisher', 'nothing', 'allIsEmpty'): {
+        'checks': [
+            ('empty', 'first', 'First party cookies are not empty, but they should.'),
+            ('empty', 'third', 'Third party cookies are not empty, but they should.'),
+            ('equal', 'first', 'third', 'Device ids found are equal.'),
+            ('notEqual', 'first', 'logs', 'Device ids in adsp logs are different than device ids in cookies.'),
+            ('notEqual', 'third', 'logs', 'Device ids in adsp logs are different than device ids in cookies.'),
+        ],
+    },
+    (None, 'publisher', 'nothing', 'cookieThirdIsEmpty'): {
+        'checks': [
+            ('notEmpty', 'first', 'First party cookies are empty, but they should contain a device id.'),
+            ('empty', 'third', 'Third party cookies are not empty, but they should.'),
+            ('in', 'A', 'first', 'Original device id was not found in first party cookies, seems that it was overriden by a new one.'),
+            ('notEqual', 'first', 'third', 'Device ids found are equal.'),
+            ('notIn', 'A', 'logs', 'Original device ids was found in adsp logs.'),
+        ],
+    },
+    (None, 'publisher', 'nothing', 'cookieFirstIsEmpty'): {
+        'checks': [
+            ('empty', 'first', 'First party cookies are not empty, but they should.'),
+            ('notEmpty', 'third', 'Third party cookies are empty, but they should contain a device id.'),
+            ('in', 'A', 'third', 'Original device id was not found in third party cookies, seems that it was overriden by a new one.'),
+            ('notIn', 'A', 'first', 'Original device id A from third party cookies was found in first party cookies, but it should not be there because third party cookies are disabled.'),
+            ('notIn', 'A', 'logs', 'Original device ids was found in adsp logs.'),
+        ],
+    },
+    (None, 'publisher', 'nothing', 'cookiesContainSameDevice'): {
+        'checks': [
+            ('notEmpty', 'first', 'First party cookies are empty, but they should contain a device id.'),
+            ('notEmpty', 'third', 'Third party cookies are empty, but they should contain a device id.'),
+            ('in', 'A', 'first', 'Original device id was not found in first party cookies, seems that it was overriden by a new one.'),
+            ('in', 'A', 'third', 'Original device id was not found in third party cookies, seems that it was overriden by a new one.'),
+            ('equal', 'first', 'third', 'Device ids found are different.'),
+            ('notIn', 'A', 'logs', 'Original device ids was found in adsp logs.'),
+        ],
+    },
+    (None, 'publisher', 'nothing', 'cookiesContainDifferentDevices'): {
+        'checks': [
+            ('notEmpty', 'first', 'First party cookies are empty, but they should contain a device id.'),
+            ('notEmpty', 'third', 'Third party cookies are empty, but they should contain a device id.'),
+            ('in', 'A', 'first', 'Original device id was not found in first party cookies, seems that it was overriden by a new one.'),
+            ('in', 'B', 'third', 'Original device id was not found in third party cookies, seems that it was overriden by a new one.'),
+            ('notIn', 'B', 'first', 'Original device id from third party cookies was found in first party cookies, but it should not be there because third party cookies are disabled.'),
+            ('notIn', 'A', 'logs', 'Original device id from first party cookies was found in adsp logs.'),
+            ('notIn', 'B', 'logs', 'Original device id from third party cookies was found in adsp logs.'),
+        ],
+    },
+    (None, 'publisher', 'only_first_party_cookies', 'allIsEmpty'): {
+        'checks': [
+            ('notEmpty', 'first', 'First party cookies are empty, but they should contain a device id.'),
+            ('empty', 'third', 'Third party cookies are not empty, but they should.'),
+            ('notEqual', 'first', 'third', 'Device ids found are equal.'),
+            ('equal', 'first', 'logs', 'Device ids in adsp logs are different than device ids in first party cookies.'),
+        ],
+    },
+    (None, 'publisher', 'only_first_party_cookies', 'cookieThirdIsEmpty'): {
+        'checks': [
+            ('notEmpty', 'first', 'First party cookies are empty, but they should contain a device id.'),
+            ('empty', 'third', 'Third party cookies are not empty, but they should.'),
+            ('in', 'A', 'first', 'Original device id was not found in first party cookies, seems that it was overriden by a new one.'),
+            ('notEqual', 'first', 'third', 'Device ids found are equal.'),
+            ('in', 'A', 'logs', 'Original device ids was not found in adsp logs.'),
+        ],
+    },
+    (None, 'publisher', 'only_first_party_cookies', 'cookieFirstIsEmpty'): {
+        'checks': [
+            ('notEmpty', 'first', 'First party cookies are empty, but they should contain a device id.'),
+            ('notEmpty', 'third', 'Third party cookies are empty, but they should contain a device id.'),
+            ('in', 'A', 'third', 'Original device id was not found in third party cookies, seems that it was overriden by a new one.'),
+            ('notIn', 'A', 'first', 'Original device id A from third party cookies was found in first party cookies, but it should not be there because third party cookies are disabled.'),
+            ('notIn', 'A', 'logs', 'Original device ids was not found in adsp logs.'),
+        ],
+    },
+    (None, 'publisher', 'only_first_party_cookies', 'cookiesContainSameDevice'): {
+        'checks': [
+            ('notEmpty', 'first', 'First party cookies are empty, but they should contain a device id.'),
+            ('notEmpty', 'third', 'Third party cookies are empty, but they should contain a device id.'),
+            ('in', 'A', 'first', 'Original device id was not found in first party cookies, seems that it was overriden by a new one.'),
+            ('in', 'A', 'third', 'Original device id was not found in third party cookies, seems that it was overriden by a new one.'),
+            ('equal', 'first', 'third', 'Device ids found are different.'),
+            ('in', 'A', 'logs', 'Original device ids was not found in adsp logs.'),
+        ],
+    },
+    (None, 'publisher', 'only_first_party_cookies', 'cookiesContainDifferentDevices'): {
+        'checks': [
+            ('notEmpty', 'first', 'First party cookies are empty, but they should contain a device id.'),
+            ('notEmpty', 'third', 'Third party cookies are empty, but they should contain a device id.'),
+            ('in', 'A', 'first', 'Original device id was not found in first party cookies, seems that it was overriden by a new one.'),
+            ('in', 'B', 'third', 'Original device id was not found in third party cookies, seems that it was overriden by a new one.'),
+            ('notIn', 'B', 'first', 'Original device id from third party cookies was found in first party cookies, but it should not be there because third party cookies are disabled.'),
+            ('in', 'A', 'logs', 'Original device id from first party cookies was not found in adsp logs.'),
+            ('notIn', 'B', 'logs', 'Original device id from third party cookies was found in adsp logs.'),
+        ],
+    },
+    ('chromium', 'publisher', 'only_third_party_cookies', 'allIsEmpty'): {
+        'checks': [
+            ('empty', 'first', 'First party cookies are not empty.'),
+            ('notEmpty', 'third', 'Third party cookies are empty, but they should contain a device id.'),
+            ('notEqual', 'first', 'third', 'Device ids found are equal.'),
+            ('equal', 'third', 'logs', 'Device ids in adsp logs are different than device ids in cookies.'),
+        ],
+    },
+    ('firefox', 'publisher', 'only_third_party_cookies', 'allIsEmpty'): {
+        'checks': [
+            ('notEmpty', 'first', 'First party cookies are empty, but they should contain a device id.'),
+            ('notEmpty', 'third', 'Third party cookies are empty, but they should contain a device id.'),
+            ('equal', 'first', 'third', 'Device ids found are different.'),
+            ('equal', 'first', 'logs', 'Device ids in adsp logs are different than device ids in cookies.'),
+        ],
+    },
+    ('chromium', 'publisher', 'only_third_party_cookies', 'cookieThirdIsEmpty'): {
+        'checks': [
+            ('notEmpty', 'first', 'First party cookies are empty, but they should contain a device id.'),
+            ('notEmpty', 'third', 'Third party cookies are empty, but they should contain a device id.'),
+            ('in', 'A', 'first', 'Original device id was not found in first party cookies, seems that it was overriden by a new one.'),
+            ('notIn', 'A', 'third', 'Original device id was found in third party cookies.'),
+            ('equal', 'third', 'logs', 'Original device ids was not found in adsp logs.'),
+        ],
+    },
+    ('firefox', 'publisher', 'only_third_party_cookies', 'cookieThirdIsEmpty'): {
+        'checks': [
+            ('notEmpty', 'first', 'First party cookies are empty, but they should contain a device id.'),
+            ('notEmpty', 'third', 'Third party cookies are empty, but they should contain a device id.'),
+            ('in', 'A', 'first', 'Original device id was not found in first party cookies, seems that it was overriden by a new one.'),
+            ('equal', 'first', 'third', 'Device ids found are different.'),
+            ('in', 'A', 'logs', 'Original device ids was not found in adsp logs.'),
+        ],
+    },
+    ('chromium', 'publisher', 'only_third_party_cookies', 'cookieFirstIsEmpty'): {
+        'checks': [
+            ('empty', 'first', 'First party cookies are not empty.'),
+            ('notEmpty', 'third', 'Third party cookies are empty, but they should contain a device id.'),
+            ('in', 'A', 'third', 'Original device id was not found in third party cookies, seems that it was overriden by a new one.'),
+            ('notIn', 'A', 'first', 'Original device id was found in first party cookies.'),
+            ('in', 'A', 'logs', 'Original device ids was not found in adsp logs.'),
+        ],
+    },
+    ('firefox', 'publisher', 'only_third_party_cookies', 'cookieFirstIsEmpty'): {
+        'checks': [
+            ('notEmpty', 'first', 'First party cookies are empty, but they should contain a device id.'),
+            ('notEmpty', 'third', 'Third party cookies are empty, but they should contain a device id.'),
+            ('in', 'A', 'third', 'Original device id was not found in third party cookies, seems that it was overriden by a new one.'),
+            ('in', 'A', 'first', 'Original device id A from third party cookies was not found in first party cookies, but it should be there.'),
+            ('in', 'A', 'logs', 'Original device ids was not found in adsp logs.'),
+        ],
+    },
+    (None, 'publisher', 'only_third_party_cookies', 'cookiesContainSameDevice'): {
+        'checks': [
+            ('notEmpty', 'first', 'First party cookies are empty, but they should contain a device id.'),
+            ('notEmpty', 'third', 'Third party cookies are empty, but they should contain a device id.'),
+            ('in', 'A', 'first', 'Original device id was not found in first party cookies, seems that it was overriden by a new one.'),
+            ('in', 'A', 'third', 'Original device id was not found in third party cookies, seems that it was overriden by a new one.'),
+            ('equal', 'first', 'third', 'Device ids found are different.'),
+            ('in', 'A', 'logs', 'Original device ids was not found in adsp logs.'),
+        ],
+    },
+    ('chromium', 'publisher', 'only_third_party_cookies', 'cookiesContainDifferentDevices'): {
+        'checks': [
+            ('notEmpty', 'first', 'First party cookies are empty, but they should contain a device id.'),
+            ('notEmpty', 'third', 'Third party cookies are empty, but they should contain a device id.'),
+            ('in', 'A', 'first', 'Original device id was not found in first party cookies, seems that it was overriden by a new one.'),
+            ('in', 'B', 'third', 'Original device id was not found in third party cookies, seems that it was overriden by a new one.'),
+            ('notIn', 'B', 'first', 'Original device id from third party cookies was found in first party cookies.'),
+            ('notIn', 'A', 'logs', 'Original device id from cookie first was found in adsp logs.'),
+            ('in', 'B', 'logs', 'Original device id from cookie third was not found in adsp logs.'),
+        ],
+    },
+    ('firefox', 'publisher', 'only_third_party_cookies', 'cookiesContainDifferentDevices'): {
+        'checks': [
+            ('notEmpty', 'first', 'First party cookies are empty, but they should contain a device id.'),
+            ('notEmpty', 'third', 'Third party cookies are empty, but they should contain a device id.'),
+            ('in', 'A', 'first', 'Original device id was not found in first party cookies, seems that it was overriden by a new one.'),
+            ('in', 'B', 'third', 'Original device id was not found in third party cookies, seems that it was overriden by a new one.'),
+            ('in', 'B', 'first', 'Original device id from third party cookies was not found in first party cookies, but it should be in.'),
+            ('in', 'A', 'logs', 'Original device id from cookie first was not found in adsp logs.'),
+            ('in', 'B', 'logs', 'Original device id from cookie third was not found in adsp logs.'),
+        ],
+    },
+    (None, 'click-to-advertiser', 'all_cookies', 'allIsEmpty'): {
+        'checks': [
+            ('notEmpty', 'first', 'First party cookies are empty.'),
+            ('notEmpty', 'third', 'Third party cookies are empty.'),
+            ('in', 'querystring', 'first', 'Original device id from querystring was not found in first party cookies.'),
+            ('in', 'querystring', 'third', 'Original device id from querystring was not found in third party cookies.'),
+            ('in', 'querystring', 'logs', 'Original device id from querystring was not found in adsp logs.'),
+        ],
+    },
+    (None, 'click-to-advertiser', 'all_cookies', 'cookieThirdIsEmpty'): {
+        'checks': [
+            ('notEmpty', 'first', 'First party cookies are empty.'),
+            ('notEmpty', 'third', 'Third party cookies are empty.'),
+            ('in', 'A', 'first', 'Original device id  was not found in first party cookies.'),
+            ('in', 'querystring', 'first', 'Original device id from querystring was not found in first party cookies.'),
+            ('in', 'querystring', 'third', 'Original device id  was not found in third party cookies.'),
+            ('in', 'A', 'logs', 'Original device id from cookies was not found in adsp logs.'),
+            ('in', 'querystring', 'logs', 'Original device id from querystring was not found in adsp logs.'),
+        ],
+    },
+    (None, 'click-to-advertiser', 'all_cookies', 'cookieFirstIsEmpty'): {
+        'doc': "Device id in click's url querystring will be replaced by device id in third party cookies.\nAfter that, device id in 3rd party cookies will be stacked into 1st party cookies.",
+        'checks': [
+            ('notEmpty', 'first', 'First party cookies are empty.'),
+            ('notEmpty', 'third', 'Third party cookies are empty.'),
+            ('in', 'A', 'third', 'Original device id was not found in third party cookies.'),
+            ('in', 'A', 'first', 'Original device id was not found in first party cookies.'),
+            ('notIn', 'querystring', 'first', 'Original device id from querystring was found in first party cookies.'),
+            ('in', 'A', 'logs', 'Original device id from cookies was found in adsp logs.'),
+            ('notIn', 'querystring', 'logs', 'Original device id from querystring was found in adsp logs.'),
+        ],
+    },
+    (None, 'click-to-advertiser', 'all_cookies', 'cookiesContainSameDevice'): {
+        'checks': [
+            ('notEmpty', 'first', 'First party cookies are empty.'),
+            ('notEmpty', 'third', 'Third party cookies are empty.'),
+            ('in', 'A', 'first', 'Original device id was not found in first party cookies.'),
+            ('in', 'A', 'third', 'Original device id was not found in third party cookies.'),
+            ('notIn', 'querystring', 'first', 'Original device id from querystring was found in first party cookies.'),
+            ('in', 'A', 'logs', 'Original device id from cookies was not found in adsp logs.'),
+            ('notIn', 'querystring', 'logs', 'Original device id from querystring was found in adsp logs.'),
+        ],
+    },
+    (None, 'click-to-advertiser', 'all_cookies', 'cookiesContainDifferentDevices'): {
+        'checks': [
+            ('notEmpty', 'first', 'First party cookies are empty.'),
+            ('notEmpty', 'third', 'Third party cookies are empty.'),
+            ('in', 'A', 'first', 'Original device id was not found in first party cookies.'),
+            ('in', 'B', 'third', 'Original device id was not found in third party cookies.'),
+            ('in', 'B', 'first', 'Original device id from cookies 3rd was not found in first party cookies.'),
+            ('notIn', 'querystring', 'first', 'Original device id from querystring was found in first party cookies.'),
+            ('in', 'A', 'logs', 'Original device id from cookies was found in adsp logs.'),
+            ('in', 'B', 'logs', 'Original device id from cookies was found in adsp logs.'),
+            ('notIn', 'querystring', 'logs', 'Original device id from querystring was found in adsp logs.'),
+        ],
+    },
+    (None, 'click-to-advertiser', 'nothing', 'allIsEmpty'): {
+        'doc': "Device id in click's url querystring won't we saved in cookies, but tracking request\nwill still log device id because it's in landing's page url.\nRemark that device id from existing cookies are not sent because cookies are disabled.",
+        'checks': [
+            ('empty', 'first', 'First party cookies not are empty.'),
+            ('empty', 'third', 'Third party cookies not are empty.'),
+            ('notIn', 'querystring', 'first', 'Device ids found are different.'),
+            ('notIn', 'querystring', 'third', 'Device ids found are different.'),
+            ('in', 'querystring', 'logs', 'Device ids in adsp logs are different than device ids in querystring.'),
+        ],
+    },
+    (None, 'click-to-advertiser', 'nothing', 'cookieThirdIsEmpty'): {
+        'doc': "Device id in click's url querystring won't we saved in cookies, but tracking request\nwill still log device id because it's in landing's page url.\nRemark that device id from existing cookies are not sent because cookies are disabled.",
+        'checks': [
+            ('notEmpty', 'first', 'First party cookies are empty.'),
+            ('empty', 'third', 'Third party cookies not are empty.'),
+            ('notIn', 'querystring', 'first', 'Original device id from querystring was found in first party cookies.'),
+            ('notIn', 'querystring', 'third', 'Original device id from querystring was found in third party cookies.'),
+            ('notIn', 'A', 'logs', 'Original device id from cookies was found in adsp logs.'),
+            ('in', 'querystring', 'logs', 'Original device id from querystring was not found in adsp logs.'),
+        ],
+    },
+    (None, 'click-to-advertiser', 'nothing', 'cookieFirstIsEmpty'): {
+        'doc': "Device id in click's url querystring won't we saved in cookies, but tracking request\nwill still log device id because it's in landing's page url.\nRemark that device id from existing cookies are not sent because cookies are disabled.",
+        'checks': [
+            ('empty', 'first', 'First party cookies are not empty.'),
+            ('notEmpty', 'third', 'Third party cookies are empty.'),
+            ('in', 'A', 'third', 'Original device id was not found in third party cookies.'),
+            ('notIn', 'A', 'first', 'Original device id was found in first party cookies.'),
+            ('notIn', 'querystring', 'first', 'Original device id from querystring was found in first party cookies.'),
+            ('notIn', 'A', 'logs', 'Original device ids was not found in adsp logs.'),
+            ('in', 'querystring', 'logs', 'Original device id from querystring was not found in adsp logs.'),
+        ],
+    },
+    (None, 'click-to-advertiser', 'nothing', 'cookiesContainSameDevice'): {
+        'doc': "Device id in click's url querystring won't we saved in cookies, but tracking request\nwill still log device id because it's in landing's page url.\nRemark that device id from existing cookies are not sent because cookies are disabled.",
+        'checks': [
+            ('notEmpty', 'first', 'First party cookies are empty.'),
+            ('notEmpty', 'third', 'Third party cookies are empty.'),
+            ('in', 'A', 'first', 'Original device id was not found in first party cookies.'),
+            ('in', 'A', 'third', 'Original device id was not found in third party cookies.'),
+            ('notIn', 'querystring', 'first', 'Original device id from querystring was found in first party cookies.'),
+            ('notIn', 'A', 'logs', 'Original device ids from cookies were not found in adsp logs.'),
+            ('in', 'querystring', 'logs', 'Original device id from querystring was not found in adsp logs.'),
+        ],
+    },
+    (None, 'click-to-advertiser', 'nothing', 'cookiesContainDifferentDevices'): {
+        'doc': "Device id in click's url querystring won't we saved in cookies, but tracking request\nwill still log device id because it's in landing's page url.\nRemark that device id from existing cookies are not sent because cookies are disabled.",
+        'checks': [
+            ('notEmpty', 'first', 'First party cookies are empty.'),
+            ('notEmpty', 'third', 'Third party cookies are empty.'),
+            ('in', 'A', 'first', 'Original device id was not found in first party cookies.'),
+            ('in', 'B', 'third', 'Original device id was not found in third party cookies.'),
+            ('notIn', 'B', 'first', 'Original device id from cookies 3rd was found in first party cookies.'),
+            ('notIn', 'querystring', 'first', 'Original device id from querystring was found in first party cookies.'),
+            ('notIn', 'A', 'logs', 'Original device ids was found in adsp logs.'),
+            ('notIn', 'B', 'logs', 'Original device ids was found in adsp logs.'),
+            ('in', 'querystring', 'logs', 'Original device id from querystring was not found in adsp logs.'),
+        ],
+    },
+    (None, 'click-to-advertiser', 'only_first_party_cookies', 'allIsEmpty'): {
+        'checks': [
+            ('notEmpty', 'first', 'First party cookies are empty.'),
+            ('notEmpty', 'third', 'Third party cookies are empty.'),
+            ('in', 'querystring', 'first', 'Original device id from querystring was not found in first party cookies.'),
+            ('in', 'querystring', 'third', 'Original device id from querystring was not found in third party cookies.'),
+            ('in', 'querystring', 'logs', 'Original device id from querystring was not found in adsp logs.'),
+        ],
+    },
+    (None, 'click-to-advertiser', 'only_first_party_cookies', 'cookieThirdIsEmpty'): {
+        'checks': [
+            ('notEmpty', 'first', 'First party cookies are empty.'),
+            ('notEmpty', 'third', 'Third party cookies are empty.'),
+            ('in', 'A', 'first', 'Original device id  was not found in first party cookies.'),
+            ('in', 'querystring', 'first', 'Original device id from querystring was not found in first party cookies.'),
+            ('in', 'querystring', 'third', 'Original device id  was not found in third party cookies.'),
+            ('in', 'A', 'logs', 'Original device id from cookies was not found in adsp logs.'),
+            ('in', 'querystring', 'logs', 'Original device id from querystring was not found in adsp logs.'),
+        ],
+    },
+    (None, 'click-to-advertiser', 'only_first_party_cookies', 'cookieFirstIsEmpty'): {
+        'doc': "Device id in click's url querystring will be replaced by device id in third party cookies.\nAfter that, device id in 3rd party cookies will be stacked into 1st party cookies.",
+        'checks': [
+            ('notEmpty', 'first', 'First party cookies are empty.'),
+            ('notEmpty', 'third', 'Third party cookies are empty.'),
+            ('in', 'A', 'third', 'Original device id was not found in third party cookies.'),
+            ('in', 'A', 'first', 'Original device id was not found in first party cookies.'),
+            ('notIn', 'querystring', 'first', 'Original device id from querystring was found in first party cookies.'),
+            ('in', 'A', 'logs', 'Original device id from cookies was found in adsp logs.'),
+            ('notIn', 'querystring', 'logs', 'Original device id from querystring was found in adsp logs.'),
+        ],
+    },
+    (None, 'click-to-advertiser', 'only_first_party_cookies', 'cookiesContainSameDevice'): {
+        'checks': [
+            ('notEmpty', 'first', 'First party cookies are empty.'),
+            ('notEmpty', 'third', 'Third party cookies are empty.'),
+            ('in', 'A', 'first', 'Original device id was not found in first party cookies.'),
+            ('in', 'A', 'third', 'Original device id was not found in third party cookies.'),
+            ('notIn', 'querystring', 'first', 'Original device id from querystring was found in first party cookies.'),
+            ('in', 'A', 'logs', 'Original device id from cookies was not found in adsp logs.'),
+            ('notIn', 'querystring', 'logs', 'Original device id from querystring was found in adsp logs.'),
+        ],
+    },
+    (None, 'click-to-advertiser', 'only_first_party_cookies', 'cookiesContainDifferentDevices'): {
+        'checks': [
+            ('notEmpty', 'first', 'First party cookies are empty.'),
+            ('notEmpty', 'third', 'Third party cookies are empty.'),
+            ('in', 'A', 'first', 'Original device id was not found in first party cookies.'),
+            ('in', 'B', 'third', 'Original device id was not found in third party cookies.'),
+            ('in', 'B', 'first', 'Original device id from cookies 3rd was not found in first party cookies.'),
+            ('notIn', 'querystring', 'first', 'Original device id from querystring was found in first party cookies.'),
+            ('in', 'A', 'logs', 'Original device id from cookies was found in adsp logs.'),
+            ('in', 'B', 'logs', 'Original device id from cookies was found in adsp logs.'),
+            ('notIn', 'querystring', 'logs', 'Original device id from querystring was found in adsp logs.'),
+        ],
+    },
+    ('chromium', 'click-to-advertiser', 'only_third_party_cookies', 'allIsEmpty'): {
+        'checks': [
+            ('empty', 'first', 'First party cookies are not empty.'),
+            ('notEmpty', 'third', 'Third party cookies are empty.'),
+            ('notIn', 'querystring', 'first', 'Original device id from querystring was found in first party cookies.'),
+            ('in', 'querystring', 'third', 'Original device id from querystring was not found in third party cookies.'),
+            ('in', 'querystring', 'logs', 'Original device id from querystring was not found in adsp logs.'),
+        ],
+    },
+    ('firefox', 'click-to-advertiser', 'only_third_party_cookies', 'allIsEmpty'): {
+        'checks': [
+            ('notEmpty', 'first', 'First party cookies are empty.'),
+            ('notEmpty', 'third', 'Third party cookies are empty.'),
+            ('in', 'querystring', 'first', 'Original device id from querystring was not found in first party cookies.'),
+            ('in', 'querystring', 'third', 'Original device id from querystring was not found in third party cookies.'),
+            ('in', 'querystring', 'logs', 'Original device id from querystring was not found in adsp logs.'),
+        ],
+    },
+    ('chromium', 'click-to-advertiser', 'only_third_party_cookies', 'cookieThirdIsEmpty'): {
+        'checks': [
+            ('notEmpty', 'first', 'First party cookies are empty.'),
+            ('notEmpty', 'third', 'Third party cookies are empty.'),
+            ('in', 'A', 'first', 'Original device id  was not found in first party cookies.'),
+            ('notIn', 'querystring', 'first', 'Original device id from querystring was found in first party cookies.'),
+            ('in', 'querystring', 'third', 'Original device id was not found in third party cookies.'),
+            ('notIn', 'A', 'logs', 'Original device id from cookies was found in adsp logs.'),
+            ('in', 'querystring', 'logs', 'Original device id from querystring was not found in adsp logs.'),
+        ],
+    },
+    ('firefox', 'click-to-advertiser', 'only_third_party_cookies', 'cookieThirdIsEmpty'): {
+        'checks': [
+            ('notEmpty', 'first', 'First party cookies are empty.'),
+            ('notEmpty', 'third', 'Third party cookies are empty.'),
+            ('in', 'A', 'first', 'Original device id  was not found in first party cookies.'),
+            ('in', 'querystring', 'first', 'Original device id from querystring was not found in first party cookies.'),
+            ('in', 'querystring', 'third', 'Original device id  was not found in third party cookies.'),
+            ('in', 'A', 'logs', 'Original device id from cookies was not found in adsp logs.'),
+            ('in', 'querystring', 'logs', 'Original device id from querystring was not found in adsp logs.'),
+        ],
+    },
+    ('chromium', 'click-to-advertiser', 'only_third_party_cookies', 'cookieFirstIsEmpty'): {
+        'doc': "Device id in click's url querystring will be replaced by device id in third party cookies.\nAfter that, device id in 3rd party cookies will be stacked into 1st party cookies.",
+        'checks': [
+            ('empty', 'first', 'First party cookies are not empty.'),
+            ('notEmpty', 'third', 'Third party cookies are empty.'),
+            ('in', 'A', 'third', 'Original device id was not found in third party cookies.'),
+            ('notIn', 'A', 'first', 'Original device id was found in first party cookies.'),
+            ('notIn', 'querystring', 'first', 'Original device id from querystring was found in first party cookies.'),
+            ('in', 'A', 'logs', 'Original device id from cookies was found in adsp logs.'),
+            ('notIn', 'querystring', 'logs', 'Original device id from querystring was found in adsp logs.'),
+        ],
+    },
+    ('firefox', 'click-to-advertiser', 'only_third_party_cookies', 'cookieFirstIsEmpty'): {
+        'doc': "Device id in click's url querystring will be replaced by device id in third party cookies.\nAfter that, device id in 3rd party cookies will be stacked into 1st party cookies.",
+        'checks': [
+            ('notEmpty', 'first', 'First party cookies are empty.'),
+            ('notEmpty', 'third', 'Third party cookies are empty.'),
+            ('in', 'A', 'third', 'Original device id was not found in third party cookies.'),
+            ('in', 'A', 'first', 'Original device id was not found in first party cookies.'),
+            ('notIn', 'querystring', 'first', 'Original device id from querystring was found in first party cookies.'),
+            ('in', 'A', 'logs', 'Original device id from cookies was found in adsp logs.'),
+            ('notIn', 'querystring', 'logs', 'Original device id from querystring was found in adsp logs.'),
+        ],
+    },
+    (None, 'click-to-advertiser', 'only_third_party_cookies', 'cookiesContainSameDevice'): {
+        'checks': [
+            ('notEmpty', 'first', 'First party cookies are empty.'),
+            ('notEmpty', 'third', 'Third party cookies are empty.'),
+            ('in', 'A', 'first', 'Original device id was not found in first party cookies.'),
+            ('in', 'A', 'third', 'Original device id was not found in third party cookies.'),
+            ('notIn', 'querystring', 'first', 'Original device id from querystring was found in first party cookies.'),
+            ('in', 'A', 'logs', 'Original device id from cookies was not found in adsp logs.'),
+            ('notIn', 'querystring', 'logs', 'Original device id from querystring was found in adsp logs.'),
+        ],
+    },
+    ('chromium', 'click-to-advertiser', 'only_third_party_cookies', 'cookiesContainDifferentDevices'): {
+        'checks': [
+            ('notEmpty', 'first', 'First party cookies are empty.'),
+            ('notEmpty', 'third', 'Third party cookies are empty.'),
+            ('in', 'A', 'first', 'Original device id was not found in first party cookies.'),
+            ('in', 'B', 'third', 'Original device id was not found in third party cookies.'),
+            ('notIn', 'B', 'first', 'Original device id from cookies 3rd was found in first party cookies.'),
+            ('notIn', 'querystring', 'first', 'Original device id from querystring was found in first party cookies.'),
+            ('notIn', 'A', 'logs', 'Original device id from cookies was found in adsp logs.'),
+            ('in', 'B', 'logs', 'Original device id from cookies was found in adsp logs.'),
+            ('notIn', 'querystring', 'logs', 'Original device id from querystring was found in adsp logs.'),
+        ],
+    },
+    ('firefox', 'click-to-advertiser', 'only_third_party_cookies', 'cookiesContainDifferentDevices'): {
+        'checks': [
+            ('notEmpty', 'first', 'First party cookies are empty.'),
+            ('notEmpty', 'third', 'Third party cookies are empty.'),
+            ('in', 'A', 'first', 'Original device id was not found in first party cookies.'),
+            ('in', 'B', 'third', 'Original device id was not found in third party cookies.'),
+            ('in', 'B', 'first', 'Original device id from cookies 3rd was not found in first party cookies.'),
+            ('notIn', 'querystring', 'first', 'Original device id from querystring was found in first party cookies.'),
+            ('in', 'A', 'logs', 'Original device id from cookies was found in adsp logs.'),
+            ('in', 'B', 'logs', 'Original device id from cookies was found in adsp logs.'),
+            ('notIn', 'querystring', 'logs', 'Original device id from querystring was found in adsp logs.'),
+        ],
+    },
+}
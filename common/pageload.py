@@ -0,0 +1,36 @@
+import time
+
+
+class PageLoad:
+    """ Outcome of Chromium.openUrl() / Firefox.openUrl()
+        reason tells why waiting stopped:
+            'signal': wait_for() told the page was done
+            'exit': browser process exited by itself
+            'load': page load event fired in the session browser
+            'timeout': timeout was reached first
+    """
+
+    def __init__(self, url):
+        self.url = url
+        self.started = time.monotonic()
+        self.duration = None
+        self.reason = None
+
+
+    def elapsed(self):
+        return time.monotonic() - self.started
+
+
+    def finish(self, reason):
+        self.duration = round(self.elapsed(), 3)
+        self.reason = reason
+        return self
+
+
+    @property
+    def timedOut(self):
+        return self.reason == 'timeout'
+
+
+    def __repr__(self):
+        return 'PageLoad({}, reason={}, duration={})'.format(self.url, self.reason, self.duration)
@@ -0,0 +1,108 @@
+import os
+import queue
+import shutil
+from contextlib import contextmanager
+from common import files
+
+
+# files a running browser leaves behind, and the preference backups of the template (common/backups.py),
+# they must not be cloned
+IGNORED = shutil.ignore_patterns('lock', '.parentlock', 'parent.lock', 'SingletonLock', 'SingletonSocket', 'SingletonCookie', '.backups')
+
+
+def clone(template_folder, folder):
+    """ Replaces folder by a fresh clone of template_folder
+    :param template_folder: golden profile
+    :param folder: profile to (re)create
+    """
+    tmp = '{}.tmp'.format(folder)
+    old = '{}.old'.format(folder)
+    for path in (tmp, old):
+        if os.path.exists(path):
+            shutil.rmtree(path)
+
+    shutil.copytree(template_folder, tmp, symlinks=True, ignore=IGNORED, copy_function=files.reflink)
+
+    if os.path.exists(folder):
+        os.rename(folder, old)
+    os.rename(tmp, folder)
+    if os.path.exists(old):
+        shutil.rmtree(old)
+
+
+class Profile:
+    """ A browser profile derived from a template profile
+    """
+
+    def __init__(self, browser, template_folder, folder):
+        self.browser = browser
+        self.template_folder = template_folder
+        self.folder = folder
+
+
+    def reset(self):
+        """ Restores the profile to template state, replaces cookies flush and preferences restore
+        """
+        clone(self.template_folder, self.folder)
+
+
+    def environment(self):
+        """ Environment variables handing this profile over to a child process
+        :return: dict
+        """
+        prefix = 'DEVICEID_{}'.format(self.browser.upper())
+        return {
+            '{}_TEMPLATE'.format(prefix): self.template_folder,
+            '{}_PROFILE'.format(prefix): self.folder,
+        }
+
+
+def leased(browser):
+    """ Returns the profile leased to the current process by the runner, if any
+    :param browser: string (chromium|firefox)
+    :return: Profile or None
+    """
+    prefix = 'DEVICEID_{}'.format(browser.upper())
+    template_folder = os.environ.get('{}_TEMPLATE'.format(prefix))
+    folder = os.environ.get('{}_PROFILE'.format(prefix))
+    if not template_folder or not folder:
+        return None
+    return Profile(browser, template_folder, folder)
+
+
+class ProfilePool:
+    """ N profiles cloned from a template profile, leased one per worker.
+        Profiles are cloned lazily: the suite resets the profile it leased in setUpClass().
+    """
+
+    def __init__(self, browser, template_folder, pool_folder, size):
+        self.browser = browser
+        self.template_folder = template_folder
+        self.pool_folder = pool_folder
+        self.size = size
+        self.profiles = queue.Queue()
+
+
+    def build(self):
+        os.makedirs(self.pool_folder, exist_ok=True)
+        for i in range(self.size):
+            folder = os.path.join(self.pool_folder, '{}-{}'.format(self.browser, i))
+            self.profiles.put(Profile(self.browser, self.template_folder, folder))
+
+
+    @contextmanager
+    def lease(self):
+        """ Borrows a profile, blocks until one is available
+        """
+        profile = self.profiles.get()
+        try:
+            yield profile
+        finally:
+            self.profiles.put(profile)
+
+
+    def destroy(self):
+        while not self.profiles.empty():
+            profile = self.profiles.get_nowait()
+            if os.path.exists(profile.folder):
+                shutil.rmtree(profile.folder)
@@ -0,0 +1,333 @@
+#!/usr/bin/env python3
+""" Parallel runner for device id test suites.
+
+    Usage, from repository root:
+
+        python3 -m common.runner run [--workers N] [--browser B] [--flow F] [--policy P] [--report FILE] [--timings FILE]
+
+    Every (browser, flow, cookie policy) of common/matrix.py becomes a job, running the matching
+    TestCase of the flow's test_scenarios.py. Jobs are run in child processes over a pool of
+    worker threads. When settings.profile_pool is set, every job leases its own clone of the
+    browser profile, otherwise jobs of the same browser share one profile and never run at the
+    same time. Results are written to one combined JSON report, with a per phase timing summary.
+"""
+
+import argparse
+import importlib.util
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import contextmanager
+from common import profilepool
+from common import scenarios
+from common import timing
+
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BROWSERS = ['chromium', 'firefox']
+FLOWS = ['publisher', 'click-to-advertiser']
+SUITE_FILE = 'test_scenarios.py'
+
+
+class Job:
+
+    def __init__(self, browser, flow, policy, path):
+        self.browser = browser
+        self.flow = flow
+        self.policy = policy
+        self.path = path
+
+
+    @property
+    def name(self):
+        return '{}/{}/{}'.format(self.browser, self.flow, self.policy)
+
+
+    def __repr__(self):
+        return 'Job({})'.format(self.name)
+
+
+def discover(root=ROOT, browsers=None, flows=None, policies=None):
+    """ Builds the job list from the scenario matrix, one job per (browser, flow, policy)
+    :param root: repository root folder
+    :param browsers: list of browsers to keep, all by default
+    :param flows: list of flows to keep, all by default
+    :param policies: list of cookie policies to keep (e.g. 'all_cookies', 'nothing'), all by default
+    :return: list of Job
+    """
+    jobs = {}
+    for case in scenarios.cases(browsers, flows, policies):
+        path = os.path.join(root, case.browser, case.flow, SUITE_FILE)
+        if case.browser not in BROWSERS or not os.path.isfile(path):
+            continue
+        key = (case.browser, case.flow, case.policy)
+        if key not in jobs:
+            jobs[key] = Job(case.browser, case.flow, case.policy, path)
+    return list(jobs.values())
+
+
+class Runner:
+
+    def __init__(self, root=ROOT, workers=None, pools=None):
+        self.root = root
+        self.workers = workers or os.cpu_count() or 1
+        # browser -> ProfilePool, browsers without a pool share one profile and are serialized
+        self.pools = pools or {}
+        self.locks = {browser: threading.Lock() for browser in BROWSERS}
+
+
+    @contextmanager
+    def profile(self, job):
+        """ Holds the browser profile used by a job
+        :param job: Job
+        :return: dict environment for the child process
+        """
+        if job.browser in self.pools:
+            with self.pools[job.browser].lease() as profile:
+                yield profile.environment()
+        else:
+            with self.locks[job.browser]:
+                yield {}
+
+
+    def schedule(self, jobs):
+        """ Orders jobs so that consecutive jobs use different browsers, which keeps workers busy
+        :param jobs: list of Job
+        :return: list of Job
+        """
+        lanes = {}
+        for job in jobs:
+            lanes.setdefault(job.browser, []).append(job)
+
+        ordered = []
+        while any(lanes.values()):
+            for browser in list(lanes.keys()):
+                if lanes[browser]:
+                    ordered.append(lanes[browser].pop(0))
+        return ordered
+
+
+    def runJob(self, job):
+        """ Runs a suite in a child process and collects its result
+        :param job: Job
+        :return: dict
+        """
+        env = dict(os.environ)
+        env['PYTHONPATH'] = os.pathsep.join(filter(None, [self.root, env.get('PYTHONPATH')]))
+
+        cmd = [sys.executable, '-m', 'common.runner', 'job', job.path, '--policy', job.policy]
+        with self.profile(job) as profile_env:
+            env.update(profile_env)
+            start = time.monotonic()
+            proc = subprocess.run(cmd, cwd=self.root, env=env, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+            duration = time.monotonic() - start
+
+        result = {
+            'job': job.name,
+            'browser': job.browser,
+            'flow': job.flow,
+            'policy': job.policy,
+            'path': os.path.relpath(job.path, self.root),
+            'duration': round(duration, 3),
+            'returncode': proc.returncode,
+            'tests': [],
+        }
+        try:
+            result['tests'] = json.loads(proc.stdout.decode('utf-8'))
+        except ValueError:
+            result['error'] = proc.stderr.decode('utf-8', errors='replace')
+        return result
+
+
+    def run(self, jobs):
+        """ Runs all jobs over the worker pool
+        :param jobs: list of Job
+        :return: dict combined report
+        """
+        start = time.monotonic()
+        results = []
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            futures = [executor.submit(self.runJob, job) for job in self.schedule(jobs)]
+            for future in as_completed(futures):
+                result = future.result()
+                results.append(result)
+                print('{:<60} {}'.format(result['job'], summarize([result])), file=sys.stderr)
+
+        results.sort(key=lambda r: r['job'])
+        return {
+            'duration': round(time.monotonic() - start, 3),
+            'workers': self.workers,
+            'summary': summarize(results),
+            'jobs': results,
+        }
+
+
+def buildPools(browsers, workers):
+    """ Builds one profile pool per browser from settings.profile_pool
+    :param browsers: list of browsers being run
+    :param workers: number of concurrent jobs
+    :return: dict browser -> ProfilePool, empty when pools are not configured
+    """
+    try:
+        import settings
+    except ImportError:
+        return {}
+
+    config = getattr(settings, 'profile_pool', None)
+    if not config:
+        return {}
+
+    size = min(config.get('size', workers), workers)
+    pools = {}
+    for browser in browsers:
+        template_folder = getattr(settings, browser)['profile_folder']
+        pools[browser] = profilepool.ProfilePool(browser, template_folder, config['folder'], size)
+        pools[browser].build()
+    return pools
+
+
+def summarize(results):
+    """ Counts test outcomes over a list of job results
+    :param results: list of job result dicts
+    :return: dict outcome -> count
+    """
+    summary = {'success': 0, 'failure': 0, 'error': 0, 'skipped': 0, 'crashed': 0}
+    for result in results:
+        if 'error' in result:
+            summary['crashed'] += 1
+        for test in result['tests']:
+            summary[test['outcome']] += 1
+    return summary
+
+
+class JsonTestResult(unittest.TestResult):
+    """ Collects one record per test, dumped as json by the child process
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.records = []
+        self.started = None
+
+
+    def startTest(self, test):
+        super().startTest(test)
+        self.started = time.monotonic()
+
+
+    def stopTest(self, test):
+        super().stopTest(test)
+        self.started = None
+
+
+    def record(self, test, outcome, detail=None):
+        # setUpClass / tearDownClass errors are reported without startTest()
+        duration = 0
+        if self.started is not None:
+            duration = round(time.monotonic() - self.started, 3)
+        self.records.append({
+            'test': test.id(),
+            'outcome': outcome,
+            'duration': duration,
+            'detail': detail,
+        })
+
+
+    def addSuccess(self, test):
+        super().addSuccess(test)
+        self.record(test, 'success')
+
+
+    def addFailure(self, test, err):
+        super().addFailure(test, err)
+        self.record(test, 'failure', self.failures[-1][1])
+
+
+    def addError(self, test, err):
+        super().addError(test, err)
+        self.record(test, 'error', self.errors[-1][1])
+
+
+    def addSkip(self, test, reason):
+        super().addSkip(test, reason)
+        self.record(test, 'skipped', reason)
+
+
+def runSuite(path, policy=None):
+    """ Loads a suite file the same way `python3 <path>` would and runs it
+    :param path: full path to a test_scenarios.py file
+    :param policy: only run the TestCase of this cookie policy
+    :return: list of test records
+    """
+    # suites import their base class as a sibling module
+    sys.path.insert(0, os.path.dirname(path))
+    spec = importlib.util.spec_from_file_location('suite', path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+
+    suite = unittest.TestSuite()
+    for value in vars(module).values():
+        if isinstance(value, type) and issubclass(value, unittest.TestCase) and getattr(value, 'policy_name', None):
+            if policy is None or value.policy_name == policy:
+                suite.addTests(unittest.defaultTestLoader.loadTestsFromTestCase(value))
+    result = JsonTestResult()
+    suite.run(result)
+    return result.records
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python3 -m common.runner', description='Run device id test suites in parallel.')
+    subparsers = parser.add_subparsers(dest='command')
+
+    run_parser = subparsers.add_parser('run', help='run the suite matrix')
+    run_parser.add_argument('--workers', type=int, default=None, help='number of concurrent jobs, cpu count by default')
+    run_parser.add_argument('--browser', action='append', choices=BROWSERS, help='restrict to a browser, repeatable')
+    run_parser.add_argument('--flow', action='append', choices=FLOWS, help='restrict to a flow, repeatable')
+    run_parser.add_argument('--policy', action='append', help='restrict to a cookie policy, e.g. all_cookies or nothing, repeatable')
+    run_parser.add_argument('--report', default='report.json', help='combined json report path')
+    run_parser.add_argument('--timings', default='timings.jsonl', help='per test phase timings, json lines')
+
+    job_parser = subparsers.add_parser('job', help='run a single suite file and print json results (internal)')
+    job_parser.add_argument('path')
+    job_parser.add_argument('--policy', default=None, help='only run the TestCase of this cookie policy')
+
+    args = parser.parse_args(argv)
+
+    if args.command == 'job':
+        print(json.dumps(runSuite(os.path.abspath(args.path), args.policy)))
+        return 0
+
+    if args.command == 'run':
+        jobs = discover(browsers=args.browser, flows=args.flow, policies=args.policy)
+        if not jobs:
+            parser.error('no suite matches the given filters')
+        # children append one line per test, see common/timing.py
+        open(args.timings, 'w').close()
+        os.environ[timing.ENV] = os.path.abspath(args.timings)
+
+        runner = Runner(workers=args.workers)
+        runner.pools = buildPools(sorted(set(job.browser for job in jobs)), runner.workers)
+        try:
+            report = runner.run(jobs)
+        finally:
+            for pool in runner.pools.values():
+                pool.destroy()
+        report['timings'] = timing.summarize(timing.load(args.timings))
+        print(timing.table(report['timings']), file=sys.stderr)
+        with open(args.report, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(json.dumps(report['summary']))
+        summary = report['summary']
+        return 1 if summary['failure'] or summary['error'] or summary['crashed'] else 0
+
+    parser.print_help()
+    return 2
+
+
+if __name__ == '__main__':
+    sys.exit(main())
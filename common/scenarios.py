@@ -0,0 +1,379 @@
+""" Generates the device id TestCases from the declarative matrix in common/matrix.py.
+
+    Every (browser, flow, policy) becomes one TestCase class deriving from the flow base class
+    (test_chromium.TestChromium, test_firefox.TestFirefox), with one test per scenario.
+    Flow base classes derive from ScenarioTestCase, which runs a scenario, and only provide
+    the browser specific hooks.
+"""
+
+import time
+import uuid
+import unittest
+import collections
+from common import adsplog
+from common import database
+from common import deviceid
+from common import matrix
+from common import profilepool
+from common import timing
+
+
+# parameter added to browsed urls, its value is the test token
+TOKEN = 'deviceid-test'
+
+# what check operands stand for, attributes set on the TestCase by setup_scenario() / fetch_devices()
+OPERANDS = {
+    'first': 'devicesFirst',
+    'third': 'devicesThird',
+    'logs': 'devicesLogs',
+    'A': 'deviceIdA',
+    'B': 'deviceIdB',
+    'querystring': 'device_id_querystring',
+}
+
+ASSERTIONS = {
+    'equal': 'assertEqual',
+    'notEqual': 'assertNotEqual',
+    'in': 'assertIn',
+    'notIn': 'assertNotIn',
+}
+
+
+Case = collections.namedtuple('Case', ['browser', 'flow', 'policy', 'scenario', 'expectation'])
+
+
+def cases(browsers=None, flows=None, policies=None):
+    """ Cases of the matrix, in table order
+    :param browsers: list of browsers to keep, all by default
+    :param flows: list of flows to keep, all by default
+    :param policies: list of cookie policies to keep, all by default
+    :return: list of Case
+    """
+    found = []
+    for browser in ('chromium', 'firefox'):
+        if browsers and browser not in browsers:
+            continue
+        for (only, flow, policy, scenario), expectation in matrix.EXPECTATIONS.items():
+            if only not in (None, browser):
+                continue
+            # a browser specific expectation wins over the shared one
+            if only is None and (browser, flow, policy, scenario) in matrix.EXPECTATIONS:
+                continue
+            if flows and flow not in flows:
+                continue
+            if policies and policy not in policies:
+                continue
+            found.append(Case(browser, flow, policy, scenario, expectation))
+    return found
+
+
+def check(testcase, checks):
+    """ Runs expectation checks against a TestCase which browsed a scenario
+    :param testcase: unittest.TestCase
+    :param checks: list of (assertion, operand, [operand,] message)
+    """
+    for assertion, *operands, message in checks:
+        values = [getattr(testcase, OPERANDS[operand]) for operand in operands]
+        if assertion == 'empty':
+            testcase.assertEqual(len(values[0]), 0, message)
+        elif assertion == 'notEmpty':
+            testcase.assertNotEqual(len(values[0]), 0, message)
+        else:
+            getattr(testcase, ASSERTIONS[assertion])(values[0], values[1], message)
+
+
+def loggedOperands(checks):
+    """ Operands whose device ids the browser must send, so the adsp log line of the test carries them
+    :param checks: list of (assertion, operand, [operand,] message)
+    :return: list of operands, e.g. ['A', 'querystring']
+    """
+    operands = []
+    for assertion, *values, message in checks:
+        if assertion not in ('in', 'equal') or 'logs' not in values:
+            continue
+        for operand in values:
+            if operand != 'logs' and operand not in operands:
+                operands.append(operand)
+    return operands
+
+
+def deviceIds(testcase, operands):
+    """ Device ids operands stand for on a TestCase, operands not set yet are left out
+    :return: list of strings
+    """
+    found = []
+    for operand in operands:
+        value = getattr(testcase, OPERANDS[operand], None)
+        if isinstance(value, str):
+            found.append(value)
+        elif value:
+            found.extend(value)
+    return found
+
+
+def uniqueDeviceId(device_id):
+    """ Same timestamp, random uuid
+    """
+    timestamp = int(device_id.split('.', 1)[0])
+    return str(deviceid.DeviceId(timestamp, uuid.uuid4().bytes))
+
+
+def personalize(scenario):
+    """ Copy of a scenario for one test: device ids made unique and a token to tag urls with, so a log line of
+        the test can't be mistaken for the one of another job browsing the same scenario at the same time
+    :param scenario: dict from matrix.SCENARIOS
+    :return: dict
+    """
+    return dict(scenario,
+                querystring=uniqueDeviceId(scenario['querystring']),
+                devices={name: uniqueDeviceId(device_id) for name, device_id in scenario['devices'].items()},
+                token=uuid.uuid4().hex)
+
+
+def tagUrl(url, token):
+    """ Adds the test token to an url, adsp logs it in the referer column of the requests made by the page
+    """
+    separator = '&' if '?' in url else '?'
+    return '{}{}{}={}'.format(url, separator, TOKEN, token)
+
+
+def className(browser, policy):
+    """ e.g. ('chromium', 'only_first_party_cookies') -> 'TestChromiumAcceptOnlyFirstPartyCookies'
+    """
+    return 'Test{}Accept{}'.format(browser.capitalize(), ''.join(word.capitalize() for word in policy.split('_')))
+
+
+def makeTest(case):
+    def test(self):
+        self.setup_scenario(matrix.SCENARIOS[case.scenario], loggedOperands(case.expectation['checks']))
+        check(self, case.expectation['checks'])
+
+    test.__name__ = 'test_{}'.format(case.scenario)
+    test.__doc__ = case.expectation.get('doc')
+    return test
+
+
+def testCases(base, browser, flow, module, policies=None):
+    """ Builds the TestCase classes of a flow
+    :param base: flow base class, its setUp() applies the class `policy`
+    :param browser: 'chromium' or 'firefox'
+    :param flow: 'publisher' or 'click-to-advertiser'
+    :param module: name of the module the classes are put in
+    :param policies: list of cookie policies to keep, all by default
+    :return: dict class name -> TestCase class, ready for a module's globals()
+    """
+    classes = {}
+    for case in cases([browser], [flow], policies):
+        name = className(browser, case.policy)
+        if name not in classes:
+            classes[name] = type(name, (base,), {
+                '__doc__': base.__doc__,
+                '__module__': module,
+                'policy_name': case.policy,
+                'policy': matrix.POLICIES[case.policy],
+            })
+        test = makeTest(case)
+        setattr(classes[name], test.__name__, test)
+    return classes
+
+
+class ScenarioTestCase(unittest.TestCase):
+    """ Runs the scenarios of a flow in a browser: seeds cookies, browses, then reads device ids
+        from cookies and adsp logs.
+        Profile and cookie policy are shared by the tests of the class, only cookies are reset between tests.
+        With settings.browser_session and a leased profile, the class browses in one long lived browser,
+        whose cookies are seeded, read and reset through its remote protocol instead of the cookie database.
+        Subclasses set `browser_name` and `website`, and provide the browser hooks:
+        setup_browser(), open_cookies(), apply_policy(), policy_applied() and reset_policy().
+    """
+
+    # cookie policy from common/matrix.py POLICIES, set by testCases() on generated classes
+    policy = None
+    # 'chromium' or 'firefox', names the profile pool
+    browser_name = None
+    # settings of the browsed website, e.g. settings.publisher
+    website = None
+
+    @classmethod
+    def setUpClass(cls):
+        # setup website
+        cls.domains = cls.website['domains']
+
+        # setup browser, on a fresh profile clone when the runner leased one
+        cls.profile = profilepool.leased(cls.browser_name)
+        if cls.profile:
+            cls.profile.reset()
+        cls.setup_browser()
+
+        # apply the cookie policy once for the whole class
+        if cls.policy:
+            cls.apply_policy(cls.policy)
+
+        # one browser for the whole class, started once the policy is applied as it is read at startup.
+        # The session writes its remote port to the profile, only a leased clone may run one
+        import settings
+        cls.session = getattr(settings, 'browser_session', False) and cls.profile is not None
+        if cls.session:
+            cls.browser.startSession()
+
+
+    def setUp(self):
+        # imported here, so the matrix can be listed without settings.py
+        import settings
+
+        # time every phase of the test, see common/timing.py
+        timing.begin(self.id())
+        self.addCleanup(timing.end)
+
+        # setup adsp log
+        self.adsplog = adsplog.AdspLog(settings.folder_adsp_logs)
+        self.wait_after = settings.wait_after
+
+        # setup website
+        self.url = self.website['url']
+        self.timeout = settings.http_get_timeout
+        self.cookie_name = settings.cookie_name
+
+        self.cookies = self.open_cookies()
+        if self.session:
+            # the session browser keeps its cookies in memory, delete them through the browser:
+            # the cookie database can't be restored under it, nor the policy applied again
+            self.browser.resetCookies()
+        else:
+            # restore an empty cookie database before browsing
+            self.cookies.restore()
+
+            # previous test must have left the cookie policy untouched, apply it again otherwise
+            if self.policy and not self.policy_applied(self.policy):
+                self.apply_policy(self.policy)
+
+
+    def fetch_devices(self):
+        """ fetch all device ids from cookies and logs
+        """
+        if self.session:
+            self.devicesFirst = deviceid.deviceIds(self.browser.getCookieValue(self.cookie_name, self.domains['first']) or '')
+            self.devicesThird = deviceid.deviceIds(self.browser.getCookieValue(self.cookie_name, self.domains['third']) or '')
+        else:
+            self.fetch_cookie_devices()
+
+        # fetch device ids from adsp logs: device ids and the token of the browsed url are unique to the test,
+        # so the line of another job browsing the same scenario never matches
+        expected = deviceIds(self, self.logged)
+        self.devicesLogs = self.adsplog.waitForDeviceIds(expected, self.wait_after, self.log_mark, self.token) or []
+
+
+    def fetch_cookie_devices(self):
+        """ fetch device ids from the cookie database
+        """
+        with self.cookies.session(readonly=True):
+            cookieFirst = self.cookies.get(self.cookie_name, self.domains['first'])
+            cookieThird = self.cookies.get(self.cookie_name, self.domains['third'])
+
+        self.devicesFirst = []
+        self.devicesThird = []
+        if cookieFirst:
+            self.devicesFirst = self.cookies.getDeviceIdsFromCookie(cookieFirst)
+        if cookieThird:
+            self.devicesThird = self.cookies.getDeviceIdsFromCookie(cookieThird)
+
+
+    def open_and_wait(self, url):
+        """ Opens url until adsp logged the request of the test. When the browser is still running then,
+            waits until it wrote the third party cookie, settings.wait_after at most.
+            A session browser keeps running and its cookies are read from memory, no need to wait for the database
+        """
+        if not self.session:
+            self.cookies.setup()
+            before = self.cookies.get(self.cookie_name, self.domains['third'])
+            self.cookies.close()
+
+        self.log_mark = self.adsplog.watch()
+        expected = deviceIds(self, self.logged)
+        load = self.browser.openUrl(url, self.timeout, lambda: self.adsplog.logged(expected, self.log_mark, self.token))
+        self.assertEqual(load.reason, 'signal', 'adsp did not log a request of the test: {}'.format(load))
+
+        # an exited browser already wrote its cookie jar, there is nothing to wait for,
+        # e.g. when the policy blocks the third party cookie and it never changes
+        if not self.session and self.browser.running():
+            deadline = time.monotonic() + self.wait_after
+            self.cookies.waitForCookie(self.cookie_name, self.domains['third'], lambda cookie: cookie and cookie != before, deadline)
+
+
+    def setup_scenario(self, scenario, logged=()):
+        """ Seeds the cookies of a scenario, then browses
+        :param scenario: dict from common/matrix.py SCENARIOS, its device ids are made unique to the test
+        :param logged: operands whose device ids the adsp log line of the test carries, see loggedOperands()
+        """
+        scenario = personalize(scenario)
+        self.token = scenario['token']
+        self.logged = logged
+        for name, device_id in scenario['devices'].items():
+            setattr(self, 'deviceId{}'.format(name), device_id)
+
+        cookies = [{'name': self.cookie_name, 'value': value.format(**scenario['devices']), 'domain': self.domains[party]}
+                   for party, value in scenario['cookies'].items()]
+        if cookies and self.session:
+            self.browser.setCookies(cookies)
+        elif cookies:
+            with self.cookies:
+                self.cookies.setMany(cookies)
+
+        # click-to-advertiser urls carry the scenario device id in querystring, publisher ones have no placeholder
+        self.device_id_querystring = scenario['querystring']
+        url = tagUrl(self.url.format(self.device_id_querystring), self.token)
+
+        # http get
+        self.open_and_wait(url)
+        self.fetch_devices()
+
+
+    @classmethod
+    def tearDownClass(cls):
+        if cls.session:
+            cls.browser.stopSession()
+
+        # restore the cookie policy, a leased profile is cloned again by the next class
+        if cls.policy:
+            cls.reset_policy(cls.policy)
+
+        # the class is done with its profile, close the connections to its databases
+        database.closeConnections()
+
+
+    @classmethod
+    def setup_browser(cls):
+        """ Sets cls.browser up on cls.profile, the leased profile clone, or on the profile of settings.py when None
+        """
+        raise NotImplementedError
+
+
+    def open_cookies(self):
+        """ Cookie database of the browser profile
+        :return: database.Database with get(), setMany() and getDeviceIdsFromCookie()
+        """
+        raise NotImplementedError
+
+
+    @classmethod
+    def apply_policy(cls, policy):
+        """ Sets cookie behavior and blacklist
+        :param policy: dict from common/matrix.py POLICIES
+        """
+        raise NotImplementedError
+
+
+    @classmethod
+    def policy_applied(cls, policy):
+        """ Tells whether the browser still matches a cookie policy
+        :param policy: dict from common/matrix.py POLICIES
+        """
+        raise NotImplementedError
+
+
+    @classmethod
+    def reset_policy(cls, policy):
+        """ Undoes apply_policy()
+        :param policy: dict from common/matrix.py POLICIES
+        """
+        raise NotImplementedError
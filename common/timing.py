@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+""" Lightweight timing of the phases of a test: cookie restore and seeding,
+    browser launch and page load, waiting for cookies, cookie read and decrypt, log find and parse.
+
+    Code wraps a phase in `with timing.span('cookies.read'):`, or decorates it with `@timing.timed('...')`.
+    Spans are only kept between begin() and end(), i.e. while a test runs: end() appends
+    one json line per test to the file named by DEVICEID_TIMINGS, when set.
+    Spans nest, e.g. cookies.read inside wait_after: a phase is reported with its self time,
+    time spent in nested spans counts for their own phase only.
+
+    Summary table of a timings file:
+
+        python3 -m common.timing timings.jsonl
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import functools
+import threading
+from contextlib import contextmanager
+
+
+ENV = 'DEVICEID_TIMINGS'
+
+lock = threading.Lock()
+# test being timed: {'test': id, 'started': ns, 'spans': [(name, ns, self ns), ...]}, None outside tests
+current = None
+# per thread stack of open spans: [name, ns spent in nested spans]
+local = threading.local()
+
+
+def begin(test):
+    """ Starts collecting spans for a test
+    :param test: test id
+    """
+    global current
+    with lock:
+        current = {'test': test, 'started': time.perf_counter_ns(), 'spans': []}
+
+
+def end(filename=None):
+    """ Stops collecting spans and writes the test breakdown as a json line
+    :param filename: json lines file, DEVICEID_TIMINGS by default, nothing is written when unset
+    :return: dict record, None when no test was being timed
+    """
+    global current
+    with lock:
+        timed, current = current, None
+    if timed is None:
+        return None
+
+    phases = {}
+    inclusive = {}
+    for name, duration, self_duration in timed['spans']:
+        phases[name] = phases.get(name, 0) + self_duration
+        inclusive[name] = inclusive.get(name, 0) + duration
+    record = {
+        'test': timed['test'],
+        'total_ms': round((time.perf_counter_ns() - timed['started']) / 1e6, 3),
+        # self time, phases add up to at most total_ms
+        'phases_ms': {name: round(duration / 1e6, 3) for name, duration in phases.items()},
+        # nested spans included
+        'inclusive_ms': {name: round(duration / 1e6, 3) for name, duration in inclusive.items()},
+        'spans': len(timed['spans']),
+    }
+
+    filename = filename or os.environ.get(ENV)
+    if filename:
+        with lock, open(filename, 'a') as f:
+            f.write(json.dumps(record) + '\n')
+    return record
+
+
+@contextmanager
+def span(name):
+    """ Times a block as phase `name` of the current test
+    """
+    stack = getattr(local, 'stack', None)
+    if stack is None:
+        stack = local.stack = []
+    frame = [name, 0]
+    stack.append(frame)
+    start = time.perf_counter_ns()
+    try:
+        yield
+    finally:
+        duration = time.perf_counter_ns() - start
+        stack.pop()
+        if stack:
+            stack[-1][1] += duration
+        with lock:
+            if current is not None:
+                current['spans'].append((name, duration, duration - frame[1]))
+
+
+def timed(name):
+    """ Decorator timing every call of a function as phase `name`
+    """
+    def decorator(function):
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            with span(name):
+                return function(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def load(filename):
+    """ Reads a timings file
+    :return: list of records
+    """
+    with open(filename) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def summarize(records):
+    """ Aggregates per phase self timings over tests, so phase totals don't count nested spans twice
+    :param records: list of records as written by end()
+    :return: dict phase -> {'tests', 'total_ms', 'mean_ms', 'max_ms'}, sorted by total time
+    """
+    durations = {}
+    for record in records:
+        durations.setdefault('total', []).append(record['total_ms'])
+        for name, duration in record['phases_ms'].items():
+            durations.setdefault(name, []).append(duration)
+
+    summary = {}
+    for name, values in sorted(durations.items(), key=lambda item: -sum(item[1])):
+        summary[name] = {
+            'tests': len(values),
+            'total_ms': round(sum(values), 3),
+            'mean_ms': round(sum(values) / len(values), 3),
+            'max_ms': round(max(values), 3),
+        }
+    return summary
+
+
+def table(summary):
+    """ Formats a summary as a text table
+    """
+    lines = ['{:<24} {:>6} {:>12} {:>10} {:>10}'.format('phase', 'tests', 'total ms', 'mean ms', 'max ms')]
+    for name, row in summary.items():
+        lines.append('{:<24} {:>6} {:>12.1f} {:>10.1f} {:>10.1f}'.format(name, row['tests'], row['total_ms'], row['mean_ms'], row['max_ms']))
+    return '\n'.join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python3 -m common.timing', description='Summarize per test phase timings.')
+    parser.add_argument('filename', help='json lines file written by the tests (DEVICEID_TIMINGS)')
+    parser.add_argument('--json', action='store_true', help='print the summary as json')
+    args = parser.parse_args(argv)
+
+    summary = summarize(load(args.filename))
+    print(json.dumps(summary, indent=2) if args.json else table(summary))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,12 +1,11 @@
 #!/usr/bin/env python3
 
 from firefox.firefox import *
-from common.adsplog import *
+from common import scenarios
 import unittest
-import time
 import settings
 
-class TestFirefox(unittest.TestCase):
+class TestFirefox(scenarios.ScenarioTestCase):
     """ Test suite to test a click on an Ad in publisher's website and a redirect to advertiser's website
         with Firefox browser.
         When a user clicks an Ad it is redirected to adsp with a device id in querystring for ALL tests
@@ -14,160 +13,60 @@ class TestFirefox(unittest.TestCase):
         Landing page has a our lib tracker.js, and it triggers a lead automatically.
     """
 
-    def setUp(self):
+    browser_name = 'firefox'
+    website = settings.click_to_advertiser
 
-        time.sleep(settings.wait_before)
+    @classmethod
+    def setup_browser(cls):
+        if cls.profile:
+            cls.browser = Firefox(None, cls.profile.folder)
+        else:
+            cls.browser = Firefox(settings.firefox['profile_name'], settings.firefox['profile_folder'])
+        cls.blacklist = Blacklist(cls.browser.profile_folder, settings.firefox['permission_db'], settings.firefox['permission_table'])
 
-        # setup adsp log
-        self.adsplog = AdspLog(settings.folder_adsp_logs)
 
-        # setup website
-        self.url = settings.click_to_advertiser['url']
-        self.timeout = settings.http_get_timeout
-        self.cookie_name = settings.cookie_name
-        self.domains = settings.click_to_advertiser['domains']
+    def open_cookies(self):
+        return Cookies(self.browser.profile_folder, settings.firefox['cookie_db'], settings.firefox['cookie_table'])
 
-        # setup firefox
-        self.browser = Firefox(settings.firefox['profile_name'], settings.firefox['profile_folder'])
 
-        # flush cookies before browsing
-        self.cookies = Cookies(settings.firefox['profile_folder'], settings.firefox['cookie_db'], settings.firefox['cookie_table'])
-        self.cookies.setup()
-        self.cookies.flush()
-        self.cookies.close()
-
-
-    def fetch_devices(self):
-        """ fetch all device ids from cookies and logs
-        """
-        self.cookies.setup()
-        cookieFirst = self.cookies.get(self.cookie_name, self.domains['first'])
-        cookieThird = self.cookies.get(self.cookie_name, self.domains['third'])
-        self.cookies.close()
-
-        self.devicesFirst = []
-        self.devicesThird = []
-        if cookieFirst:
-            self.devicesFirst = self.cookies.getDeviceIdsFromCookie(cookieFirst)
-        if cookieThird:
-            self.devicesThird = self.cookies.getDeviceIdsFromCookie(cookieThird)
-
-        self.devicesLogs = self.adsplog.getDeviceIds(self.adsplog.getLastLine())
-
-
-    def setup_allIsEmpty(self):
-        """ Device id in click's url querystring will be used to set 1st and 3rd party cookies.
-        """
-
-        """ http request
-        """
-        # setup querystring
-        self.device_id_querystring = '1447344866.44444444-4444-4444-aaaa-444444444444'
-        url = self.url.format(self.device_id_querystring)
-
-        # http get
-        self.browser.openUrl(url, self.timeout)
-        self.fetch_devices()
-
-
-    def setup_cookieThirdIsEmpty(self):
-        """ Device id in click's url querystring will be set in 3rd party cookies.
-            After that, device id in 3rd party cookies will be stacked into 1st party cookies.
-        """
-
-        """ http request
+    @classmethod
+    def apply_policy(cls, policy):
+        """ Sets cookie behavior, blacklisted domains go to the permission database
+        :param policy: dict from common/matrix.py POLICIES
         """
-        # setup querystring
-        self.device_id_querystring = '1447344866.44444444-4444-4444-bbbb-444444444444'
-        url = self.url.format(self.device_id_querystring)
+        cls.browser.setCookieBehavior(policy['cookie_behavior'])
 
-        # fill cookie 1st only
-        self.deviceIdA = '1447859209.11111111-1111-1111-bbbb-111111111111'
-        cookie_value = 'ls=1447859209770|v=1|di={}'.format(self.deviceIdA)
-        self.cookies.setup()
-        self.cookies.set(self.cookie_name, cookie_value, self.domains['first'])
-        self.cookies.close()
+        if policy['blacklist']:
+            with cls.blacklist:
+                cls.blacklist.flush()
+                for party in policy['blacklist']:
+                    cls.blacklist.add(cls.domains[party])
 
-        # http get
-        self.browser.openUrl(url, self.timeout)
-        self.fetch_devices()
-
-
-    def setup_cookieFirstIsEmpty(self):
-        """ Device id in click's url querystring will be replaced by device id in third party cookies.
-            After that, device id in 3rd party cookies will be stacked into 1st party cookies.
-        """
 
-        """ http request
+    @classmethod
+    def policy_applied(cls, policy):
+        """ Tells whether prefs and permissions still match a cookie policy
+        :param policy: dict from common/matrix.py POLICIES
         """
-        # setup querystring
-        self.device_id_querystring = '1447344866.44444444-4444-4444-cccc-444444444444'
-        url = self.url.format(self.device_id_querystring)
+        if cls.browser.cookieBehavior() != policy['cookie_behavior']:
+            return False
+        if not policy['blacklist']:
+            return True
+        with cls.blacklist.session(readonly=True):
+            return all(cls.blacklist.has(cls.domains[party]) for party in policy['blacklist'])
 
-        # fill cookie 3rd only
-        self.deviceIdA = '1447859209.33333333-3333-3333-cccc-333333333333'
-        cookie_value = 'ls%3D1447859209000%7Cv%3D1%7Cdi%3D{}'.format(self.deviceIdA)
-        self.cookies.setup()
-        self.cookies.set(self.cookie_name, cookie_value, self.domains['third'])
-        self.cookies.close()
 
-        # http get
-        self.browser.openUrl(url, self.timeout)
-        self.fetch_devices()
+    @classmethod
+    def reset_policy(cls, policy):
+        # restore cookie behavior, a leased profile is cloned again by the next class
+        if not cls.profile:
+            cls.browser.restorePreferences(cls.browser.prefs_file)
 
+        # remove blacklist
+        if policy['blacklist']:
+            with cls.blacklist:
+                cls.blacklist.flush()
 
-    def setup_cookiesContainSameDevice(self):
-        """ Device id in click's url querystring will be replaced by device id in third party cookies.
-            Device ids in first party cookies will stay the same, like third party cookies.
-        """
-
-        """ http request
-        """
-        # setup querystring
-        self.device_id_querystring = '1447344866.44444444-4444-4444-dddd-444444444444'
-        url = self.url.format(self.device_id_querystring)
-
-        self.deviceIdA = '1447859209.11111111-3333-1111-dddd-111111111111'
-        cookie_value_first = 'ls=1447859209000|v=1|di={}'.format(self.deviceIdA)
-        cookie_value_third = 'ls%3D1447859209000%7Cv%3D1%7Cdi%3D{}'.format(self.deviceIdA)
-        self.cookies.setup()
-        self.cookies.set(self.cookie_name, cookie_value_first, self.domains['first'])
-        self.cookies.set(self.cookie_name, cookie_value_third, self.domains['third'])
-        self.cookies.close()
-
-        # http get
-        self.browser.openUrl(url, self.timeout)
-        self.fetch_devices()
-
-
-    def setup_cookiesContainDifferentDevices(self):
-        """ Device id in click's url querystring will be replaced by device id in third party cookies.
-            After that, device id in 3rd party cookies will be stacked into 1st party cookies.
-        """
-
-        """ http request
-        """
-        # setup querystring
-        self.device_id_querystring = '1447344866.44444444-4444-4444-eeee-444444444444'
-        url = self.url.format(self.device_id_querystring)
-
-        self.deviceIdA = '1447859209.11111111-1111-1111-eeee-111111111111'
-        cookie_value_first = 'ls=1447859209000|v=1|di={}'.format(self.deviceIdA)
-        self.deviceIdB = '1447859209.33333333-3333-3333-eeee-333333333333'
-        cookie_value_third = 'ls%3D1447859209000%7Cv%3D1%7Cdi%3D{}'.format(self.deviceIdB)
-        self.cookies.setup()
-        self.cookies.set(self.cookie_name, cookie_value_first, self.domains['first'])
-        self.cookies.set(self.cookie_name, cookie_value_third, self.domains['third'])
-        self.cookies.close()
-
-        # http get
-        self.browser.openUrl(url, self.timeout)
-        self.fetch_devices()
-
-
-    def tearDown(self):
-        # restore cookie behavior
-        self.browser.restorePreferences(self.browser.prefs_file)
 
 
 
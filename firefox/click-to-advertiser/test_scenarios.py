@@ -0,0 +1,14 @@
+#!/usr/bin/env python3
+
+import test_firefox
+from common import scenarios
+import unittest
+
+# one TestCase per cookie policy (TestFirefoxAcceptAllCookies, ...), tests and expectations come from common/matrix.py
+globals().update(scenarios.testCases(test_firefox.TestFirefox, 'firefox', 'click-to-advertiser', __name__))
+
+
+
+
+if __name__ == '__main__':
+        unittest.main()
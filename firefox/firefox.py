@@ -1,8 +1,13 @@
+from common import backups
 from common import database
+from common import deviceid
+from common import domains
+from common import pageload
+from common import timing
+from firefox import marionette
+from firefox import prefs
 import subprocess
-import sys
-import re
-import shutil
+import time
 from datetime import datetime, timedelta
 
 
@@ -10,13 +15,14 @@ from datetime import datetime, timedelta
 class Cookies(database.Database):
 
     def delete(self, name, domain):
-        query = 'DELETE FROM {} WHERE name=? AND host=?;'.format(self.db_table)
+        query = self.statement('DELETE FROM {} WHERE name=? AND host=?;')
         values = (name, domain)
         self.db_cursor.execute(query, values);
 
 
+    @timing.timed('cookies.read')
     def get(self, name, domain):
-        query = 'SELECT * FROM {} WHERE name=? AND host=?;'.format(self.db_table)
+        query = self.statement('SELECT * FROM {} WHERE name=? AND host=?;')
         values = (name, domain)
         cookie = self.db_cursor.execute(query, values).fetchone();
         return cookie
@@ -26,38 +32,53 @@ class Cookies(database.Database):
         """
 
         """
-        a_year = timedelta(days=365)
-        today = datetime.today()
-
-        baseDomain = domain
-        if domain[0] == '.':
-            baseDomain = domain[1:]
-
-        if expiry is None:
-            expiry = int((today + a_year).timestamp())
-
-        if lastAccessed is None:
-            lastAccessed = today.timestamp() * 1000000 # in microseconds
+        self.setMany([{
+            'name': name, 'value': value, 'domain': domain, 'appId': appId, 'inBrowserElement': inBrowserElement, 'path': path,
+            'expiry': expiry, 'lastAccessed': lastAccessed, 'creationTime': creationTime, 'isSecure': isSecure, 'isHttpOnly': isHttpOnly,
+        }])
 
-        if creationTime is None:
-            creationTime = lastAccessed # in microseconds
 
-        query = 'INSERT INTO {}(baseDomain, appId, inBrowserElement, name, value, host, path, expiry, lastAccessed, creationTime, isSecure, isHttpOnly) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?);'.format(self.db_table)
-        values = (baseDomain, appId, inBrowserElement, name, value, domain, path, expiry, lastAccessed, creationTime, isSecure, isHttpOnly)
-        cookie = self.db_cursor.execute(query, values);
+    @timing.timed('cookies.seed')
+    def setMany(self, cookies):
+        """ Inserts cookies in a single transaction
+        :param cookies: iterable of dicts with set() arguments
+        """
+        a_year = timedelta(days=365)
+        today = datetime.today()
+        default_expiry = int((today + a_year).timestamp())
+        default_lastAccessed = today.timestamp() * 1000000 # in microseconds
+
+        base_domains = {}
+        rows = []
+        for cookie in cookies:
+            domain = cookie['domain']
+            baseDomain = base_domains.get(domain)
+            if baseDomain is None:
+                # eTLD+1, as firefox fills it
+                baseDomain = domains.registrable(domain)
+                base_domains[domain] = baseDomain
+
+            expiry = cookie.get('expiry')
+            if expiry is None:
+                expiry = default_expiry
+            lastAccessed = cookie.get('lastAccessed')
+            if lastAccessed is None:
+                lastAccessed = default_lastAccessed
+            creationTime = cookie.get('creationTime')
+            if creationTime is None:
+                creationTime = lastAccessed # in microseconds
+
+            rows.append((baseDomain, cookie.get('appId', 0), cookie.get('inBrowserElement', 0), cookie['name'], cookie['value'], domain,
+                         cookie.get('path', '/'), expiry, lastAccessed, creationTime, cookie.get('isSecure', 0), cookie.get('isHttpOnly', 0)))
+
+        query = self.statement('INSERT INTO {}(baseDomain, appId, inBrowserElement, name, value, host, path, expiry, lastAccessed, creationTime, isSecure, isHttpOnly) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?);')
+        self.db_cursor.executemany(query, rows)
         self.db_connection.commit()
 
 
+    @timing.timed('cookies.parse')
     def getDeviceIdsFromCookie(self, cookie):
-        rawValue = cookie[5]
-        separator_first = '='
-        separator_third = '%3D'
-        pattern = 'di(?:=|%3D)([0-9]+\.[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12})+'
-
-        p = re.compile(pattern)
-        devices = p.findall(rawValue)
-
-        return devices
+        return deviceid.deviceIds(cookie[5])
 
 
 
@@ -75,41 +96,159 @@ class Blacklist(database.Database):
 
         today = datetime.today()
 
-        origin = domain
-        if 'http' not in domain:
-            origin = 'http://*.{}'.format(domain)
+        origin = self.origin(domain)
 
         if modificationTime is None:
             modificationTime = int(today.timestamp() * 1000) # in milliseconds
 
-        query = 'INSERT INTO {}(origin, type, permission, expireType, expireTime, modificationTime) VALUES (?, ?, ?, ?, ?, ?);'.format(self.db_table)
+        query = self.statement('INSERT INTO {}(origin, type, permission, expireType, expireTime, modificationTime) VALUES (?, ?, ?, ?, ?, ?);')
         values = (origin, type, permission, expireType, expireTime, modificationTime)
         cookie = self.db_cursor.execute(query, values);
         self.db_connection.commit()
 
 
+    def has(self, domain, type='cookie', permission=2):
+        """ Tells whether a domain is blacklisted
+        :param domain: domain, as given to add()
+        :return: bool
+        """
+        query = self.statement('SELECT 1 FROM {} WHERE origin=? AND type=? AND permission=? LIMIT 1;')
+        values = (self.origin(domain), type, permission)
+        return self.db_cursor.execute(query, values).fetchone() is not None
+
+
+    def origin(self, domain):
+        if 'http' not in domain:
+            return 'http://*.{}'.format(domain)
+        return domain
+
+
 class Firefox:
 
     def __init__(self, profile_name, profile_folder, cookie_behavior=None):
         self.profile_name = profile_name
         self.profile_folder = profile_folder
         self.prefs_file = '{}/prefs.js'.format(profile_folder)
+        self.prefs = prefs.PrefsFile(self.prefs_file)
         self.cookie_behavior = cookie_behavior
-        self.command = '/usr/bin/firefox -P {} -new-window'.format(self.profile_name)
+        self.binary = '/usr/bin/firefox'
+        if profile_name:
+            self.command = '{} -P {} -new-window'.format(self.binary, self.profile_name)
+        else:
+            # profile not registered in profiles.ini, e.g. leased from a profile pool
+            self.command = '{} -profile {} -no-remote -new-window'.format(self.binary, self.profile_folder)
+        self.process = None
+        self.session = None
+
+
+    @timing.timed('browser.launch')
+    def startSession(self):
+        """ Starts one headless browser, reused by every openUrl() until stopSession().
+            Preferences are read at startup: set the cookie policy before starting a session.
+            The Marionette port pref is written to the profile, use a disposable profile, e.g. a leased clone.
+            Cookies then live in the browser, use resetCookies(), setCookies() and getCookieValue() instead of Cookies
+        """
+        if not self.session:
+            self.session = marionette.MarionetteSession(self.profile_folder, self.binary)
+            self.session.start()
+
+
+    def stopSession(self):
+        if self.session:
+            self.session.stop()
+            self.session = None
+
+
+    def resetCookies(self):
+        """ Deletes every cookie of the session browser, through the protocol: the cookie database
+            can't be restored under a running browser
+        """
+        self.session.clearCookies()
+
+
+    def setCookies(self, cookies):
+        """ Adds cookies to the session browser
+        :param cookies: iterable of dicts with name, value and domain, as given to Cookies.setMany().
+                        A domain starting with a dot makes a domain cookie, a host-only cookie otherwise
+        """
+        expiry = int(time.time()) + 365 * 24 * 3600
+        self.session.addCookies([{'name': cookie['name'], 'value': cookie['value'], 'host': cookie['domain'],
+                                  'path': cookie.get('path', '/'), 'expiry': expiry} for cookie in cookies])
 
 
-    def openUrl(self, target_url, timeout=3):
-        cmd = '{} {}'.format(self.command, target_url)
-        proc = subprocess.Popen(cmd.split(), stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
-        try:
-            proc.wait(timeout=timeout)
-        except subprocess.TimeoutExpired:
-            proc.terminate()
+    def getCookieValue(self, name, domain):
+        """ Value of a cookie of the session browser, matched like Cookies.get()
+        :param name: cookie name
+        :param domain: cookie host
+        :return: string, None when there is no such cookie
+        """
+        for cookie in self.session.getCookies():
+            if cookie['name'] == name and cookie['host'] == domain:
+                return cookie['value']
+        return None
+
+
+    @timing.timed('browser.load')
+    def openUrl(self, target_url, timeout=3, wait_for=None, settle=0.5, interval=0.05):
+        """ Opens an url in a new browser process, or in the session browser once startSession() was called,
+            and waits until the page is done
+        :param target_url: url to open
+        :param timeout: seconds to wait at most, the browser process is terminated then
+        :param wait_for: callable polled while the page loads, returning True once it is done,
+                         e.g. adsp logged the request of the test. Without it, waits for the browser process to exit,
+                         or for the page load event in a session
+        :param settle: seconds the browser keeps running after wait_for() is True, so the page handles the response
+        :param interval: seconds between two wait_for() calls
+        :return: pageload.PageLoad with timing data
+        """
+        result = pageload.PageLoad(target_url)
+        if self.session:
+            # the session browser opens the url and keeps running
+            loaded = self.session.navigate(target_url, timeout, wait=wait_for is None)
+            if wait_for is None:
+                return result.finish('load' if loaded else 'timeout')
+        else:
+            cmd = '{} {}'.format(self.command, target_url)
+            with timing.span('browser.launch'):
+                self.process = subprocess.Popen(cmd.split(), stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+            if wait_for is None:
+                try:
+                    self.process.wait(timeout=timeout)
+                except subprocess.TimeoutExpired:
+                    self.close()
+                    return result.finish('timeout')
+                return result.finish('exit')
+
+        # the url may be handed over to a browser already running on the profile, which makes ours exit:
+        # poll until the signal or the timeout
+        while not wait_for():
+            if result.elapsed() >= timeout:
+                self.close()
+                return result.finish('timeout')
+            time.sleep(interval)
+
+        time.sleep(settle)
+        # a terminated browser writes its cookies before exiting
+        self.close()
+        return result.finish('signal')
+
+
+    def running(self):
+        """ Tells whether the browser process of the last openUrl() is still running
+        """
+        return self.process is not None and self.process.poll() is None
 
 
     def close(self):
-        if self.process:
+        """ Terminates the browser process of the last openUrl(), if still running
+        """
+        if self.process and self.process.poll() is None:
             self.process.terminate()
+            try:
+                self.process.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
 
 
     def setCookieBehavior(self, cookie_behavior=None):
@@ -124,49 +263,37 @@ class Firefox:
 
         self.backupPreferences(self.prefs_file);
 
-        delete_line = "network.cookie.cookieBehavior"
-        self.deleteLine(self.prefs_file, delete_line)
+        self.updatePreferences({'network.cookie.cookieBehavior': behavior})
 
-        if behavior:
-            append_line = 'user_pref("network.cookie.cookieBehavior", {});'.format(behavior)
-            self.appendLine(self.prefs_file, append_line)
 
-
-    def deleteLine(self, filename, match_string):
-        """ Delete matching line from a file
-        :param filename: full path to file being modified
-        :param match_string: string to search in line that has to be deleted
+    def cookieBehavior(self):
+        """ Current cookies privacy settings
+        :return: string (all|only_1|visited|nothing)
         """
-        with open(filename, 'r') as f:
-            lines = f.readlines()
-
-        with open(filename, 'w') as f:
-            for line in lines:
-                if match_string not in line:
-                    f.write(line)
+        behaviors = {1: 'only_1', 3: 'visited', 2: 'nothing'}
+        return behaviors.get(self.prefs.get('network.cookie.cookieBehavior'), 'all')
 
 
-    def appendLine(self, filename, line):
-        """ Appends a line to a file
-        :param filename: full path to file being modified
-        :param line: line to append
+    def updatePreferences(self, prefs):
+        """ Sets several prefs in one write of prefs.js
+        :param prefs: dict pref name -> value, None removes the pref
+        :return: bool True when prefs.js was written
         """
-        with open(filename, 'a') as f:
-            f.write(line)
+        return self.prefs.update(prefs)
 
 
     def backupPreferences(self, filename):
-        """ Copies a file to the same location with a trailing .bak extension
+        """ Keeps the pristine content of a file, stored once by content hash
         :param filename: full path to file being backuped
         """
-        shutil.copy(filename, '{}.bak'.format(filename))
+        backups.Backup(filename).save()
 
 
     def restorePreferences(self, filename):
-        """ Copies a backuped file to the same location without the trailing .bak extension
+        """ Puts the pristine content of a file back, if it changed since backupPreferences()
         :param filename: full path to file being restored
         """
-        shutil.copy('{}.bak'.format(filename), filename)
+        backups.Backup(filename).restore()
 
 
 
@@ -0,0 +1,183 @@
+import os
+import json
+import time
+import socket
+import subprocess
+from firefox import prefs
+
+
+class MarionetteError(Exception):
+    pass
+
+
+class MarionetteSession:
+    """ Long lived headless Firefox driven over the Marionette protocol.
+        Messages are json arrays prefixed by their length: `len:[type, id, command, params]`.
+        Firefox picks a free port (marionette.port = 0) and writes it to MarionetteActivePort
+        in the profile folder, so several sessions can run side by side.
+        The port pref is written to user.js of the profile, which Firefox copies to prefs.js:
+        run sessions on a disposable profile, e.g. a clone leased from a profile pool.
+    """
+
+    def __init__(self, profile_folder, binary='/usr/bin/firefox', headless=True):
+        self.profile_folder = profile_folder
+        self.binary = binary
+        self.headless = headless
+        self.process = None
+        self.sock = None
+        self.buffer = b''
+        self.message_id = 0
+
+
+    def start(self, timeout=30):
+        port_file = '{}/MarionetteActivePort'.format(self.profile_folder)
+        if os.path.exists(port_file):
+            os.remove(port_file)
+        self.preferences({'marionette.port': 0})
+
+        args = [self.binary, '-marionette', '-no-remote', '-profile', self.profile_folder]
+        if self.headless:
+            args.append('-headless')
+        self.process = subprocess.Popen(args, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+        deadline = time.monotonic() + timeout
+        while not os.path.exists(port_file):
+            if time.monotonic() > deadline or self.process.poll() is not None:
+                self.stop()
+                raise MarionetteError('Firefox did not start Marionette')
+            time.sleep(0.05)
+        time.sleep(0.05)
+        with open(port_file) as f:
+            port = int(f.read().strip())
+
+        self.sock = socket.create_connection(('127.0.0.1', port), timeout=timeout)
+        # server says hello first
+        self.receive()
+        # navigation returns right away, navigate() waits for the load itself when asked to
+        self.send('WebDriver:NewSession', {'capabilities': {'alwaysMatch': {'pageLoadStrategy': 'none'}}})
+
+
+    def preferences(self, preferences):
+        """ Adds user prefs to user.js, applied by Firefox at startup
+        :param preferences: dict pref name -> value, None removes the pref
+        """
+        user_prefs = prefs.PrefsFile('{}/user.js'.format(self.profile_folder))
+        user_prefs.update(preferences)
+
+
+    def receive(self):
+        while b':' not in self.buffer:
+            self.buffer += self.recv()
+        length, self.buffer = self.buffer.split(b':', 1)
+        length = int(length)
+        while len(self.buffer) < length:
+            self.buffer += self.recv()
+        raw, self.buffer = self.buffer[:length], self.buffer[length:]
+        return json.loads(raw.decode('utf-8'))
+
+
+    def recv(self):
+        chunk = self.sock.recv(65536)
+        if not chunk:
+            raise MarionetteError('Marionette connection closed')
+        return chunk
+
+
+    def send(self, command, params=None):
+        """ Sends a command and waits for its response
+        :param command: Marionette command, e.g. 'WebDriver:Navigate'
+        :param params: dict
+        :return: result
+        """
+        self.message_id += 1
+        raw = json.dumps([0, self.message_id, command, params or {}]).encode('utf-8')
+        self.sock.sendall(str(len(raw)).encode('ascii') + b':' + raw)
+
+        while True:
+            message_type, message_id, error, result = self.receive()
+            if message_id == self.message_id:
+                break
+        if error:
+            raise MarionetteError('{}: {}'.format(command, error.get('message', error)))
+        return result
+
+
+    def navigate(self, url, timeout=30, wait=False, interval=0.05):
+        """ Opens url in the page
+        :param url: url to open
+        :param timeout: seconds to wait at most
+        :param wait: wait until the document is loaded
+        :return: bool False when the document was not loaded in time
+        """
+        self.send('WebDriver:Navigate', {'url': url})
+        if not wait:
+            return True
+
+        deadline = time.monotonic() + timeout
+        while self.executeScript('return document.readyState;') != 'complete':
+            if time.monotonic() >= deadline:
+                return False
+            time.sleep(interval)
+        return True
+
+
+    def executeScript(self, script, args=None, chrome=False):
+        """ Runs a script in content, or with chrome privileges
+        """
+        if chrome:
+            self.send('Marionette:SetContext', {'value': 'chrome'})
+        try:
+            result = self.send('WebDriver:ExecuteScript', {'script': script, 'args': args or []})
+        finally:
+            if chrome:
+                self.send('Marionette:SetContext', {'value': 'content'})
+        return result.get('value') if isinstance(result, dict) else result
+
+
+    def getCookies(self):
+        """ All cookies of the browser, as dicts (name, value, host, path)
+        """
+        script = """
+            const cookies = [];
+            for (const c of Services.cookies.cookies) {
+                cookies.push({name: c.name, value: c.value, host: c.host, path: c.path});
+            }
+            return cookies;
+            """
+        return self.executeScript(script, chrome=True)
+
+
+    def addCookies(self, cookies):
+        """ Adds cookies to the browser
+        :param cookies: list of dicts (name, value, host, path, expiry in seconds), a host starting with a dot
+                        makes a domain cookie, a host-only cookie otherwise
+        """
+        script = """
+            for (const c of arguments[0]) {
+                Services.cookies.add(c.host, c.path, c.name, c.value, false, false, false, c.expiry, {},
+                                     Ci.nsICookie.SAMESITE_NONE, Ci.nsICookie.SCHEME_HTTP);
+            }
+            """
+        self.executeScript(script, [cookies], chrome=True)
+
+
+    def clearCookies(self):
+        self.executeScript('Services.cookies.removeAll();', chrome=True)
+
+
+    def stop(self):
+        if self.sock:
+            try:
+                self.send('Marionette:Quit', {'flags': ['eForceQuit']})
+            except (MarionetteError, OSError):
+                pass
+            self.sock.close()
+            self.sock = None
+        if self.process:
+            try:
+                self.process.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                self.process.terminate()
+                self.process.wait()
+            self.process = None
+        self.preferences({'marionette.port': None})
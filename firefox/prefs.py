@@ -0,0 +1,82 @@
+import os
+import re
+import json
+
+
+PREF = re.compile(r'^\s*user_pref\(\s*("(?:[^"\\]|\\.)*")\s*,\s*(.*?)\s*\);\s*$')
+
+
+class PrefsFile:
+    """ prefs.js / user.js parsed once into an ordered map of user_pref() lines.
+        Parsing is cached by file stat, updates are applied in memory and written
+        back in one pass through a temporary file and os.replace().
+        Lines that aren't prefs (header, comments) are kept as they are.
+    """
+
+    def __init__(self, filename):
+        self.filename = filename
+        # name -> line, in file order; other lines are keyed by their position
+        self.lines = {}
+        self.stat = None
+
+
+    def fileStat(self):
+        try:
+            stat = os.stat(self.filename)
+        except FileNotFoundError:
+            return None
+        return (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+
+
+    def load(self):
+        stat = self.fileStat()
+        if self.stat is not None and stat == self.stat:
+            return
+
+        self.lines = {}
+        if stat:
+            with open(self.filename, encoding='utf-8') as f:
+                for position, line in enumerate(f):
+                    match = PREF.match(line)
+                    key = json.loads(match.group(1)) if match else position
+                    self.lines[key] = line if line.endswith('\n') else line + '\n'
+        self.stat = stat
+
+
+    def get(self, name):
+        """ Value of a pref, None when not set
+        """
+        self.load()
+        line = self.lines.get(name)
+        if line is None:
+            return None
+        return json.loads(PREF.match(line).group(2))
+
+
+    def update(self, prefs):
+        """ Sets prefs and writes the file once, nothing is written when values are unchanged
+        :param prefs: dict pref name -> value, None removes the pref
+        :return: bool True when the file was written
+        """
+        self.load()
+        changed = False
+        for name, value in prefs.items():
+            if value is None:
+                changed = self.lines.pop(name, None) is not None or changed
+                continue
+            line = 'user_pref({}, {});\n'.format(json.dumps(name), json.dumps(value))
+            if self.lines.get(name) != line:
+                self.lines[name] = line
+                changed = True
+
+        if changed:
+            self.save()
+        return changed
+
+
+    def save(self):
+        tmp_file = '{}.tmp'.format(self.filename)
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            f.writelines(self.lines.values())
+        os.replace(tmp_file, self.filename)
+        self.stat = self.fileStat()
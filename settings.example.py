@@ -1,12 +1,12 @@
 
 # in seconds
-wait_before = 2
-
-# in seconds
-# time to wait after browser close, to give time to browser to write cookies to database
+# maximum time to wait for adsp log lines, and for a browser still running after the page load to write
+# cookies to database, tests go on as soon as the third party cookie changed.
+# A closed browser already wrote its cookies, tests don't wait for it
 wait_after = 3
 
 # in seconds
+# maximum time for adsp to log the request of the page, the browser is closed as soon as it did
 http_get_timeout = 5
 
 # cookie name
@@ -32,6 +32,18 @@ click_to_advertiser = {
     'url': 'http://www2.adsp.localhost/click.php?id=2763-21915-5069&context-hash=e0ff593dd1fbda31689e7e1826d4e4aef0394f5a&di={}&data=&preurl=',
 }
 
+# parallel runs: every runner worker gets its own clone of the browser profiles below,
+# comment out to run on the shared profiles one job per browser at a time
+profile_pool = {
+    'folder': '/tmp/deviceid_profiles', # absolute path
+    'size': 4,
+}
+
+# browse every test of a class in one headless browser, started once per class, instead of a browser per page:
+# cookies are then seeded, read and deleted through the DevTools / Marionette protocol.
+# Needs profile_pool, the session writes its remote port to the profile clone
+browser_session = False
+
 # firefox settings
 firefox = {
     'profile_name': 'CookiesAll',